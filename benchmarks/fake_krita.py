@@ -0,0 +1,327 @@
+"""
+Headless stand-in for the `krita` module.
+
+Implements the part of Krita's scripting API the plugin uses, on top of
+real Qt objects, so the plugin can be imported and driven without Krita:
+actions, windows with views and viewports, a notifier, a toolbox with
+`KoToolBoxButton`s, a `BrushesAndStuff` toolbar with the eraser button,
+settings and a `resources('preset')` dict.
+
+Call `install()` before importing the plugin. It registers this module
+as `krita` and creates the application instance.
+"""
+
+import sys
+from typing import Dict, List, Optional
+
+from qtpy.QtCore import QObject, Signal
+from qtpy.QtGui import QIcon, QImage
+from qtpy.QtWidgets import (
+    QAction,
+    QButtonGroup,
+    QDockWidget,
+    QMainWindow,
+    QMdiArea,
+    QToolBar,
+    QToolButton,
+    QWidget,
+)
+
+TOOLS = [
+    "KritaShape/KisToolBrush",
+    "KritaShape/KisToolLine",
+    "KritaShape/KisToolRectangle",
+    "KritaShape/KisToolEllipse",
+    "KisToolTransform",
+    "KritaTransform/KisToolMove",
+    "KritaFill/KisToolFill",
+    "KritaSelected/KisToolColorSampler",
+    "KisToolSelectRectangular",
+    "ZoomTool",
+    "PanTool",
+]
+"""Tools present in the fake toolbox. The first one is active on start."""
+
+
+class Extension(QObject):
+    """Base class of krita extensions."""
+
+    def __init__(self, parent) -> None:
+        super().__init__(parent)
+
+
+class Resource:
+    """Krita preset resource."""
+
+    def __init__(self, name: str, resource_id: int) -> None:
+        self._name = name
+        self._id = resource_id
+        self._image = QImage(200, 200, QImage.Format_ARGB32)
+        self._image.fill(0xff808080)
+
+    def name(self) -> str:
+        return self._name
+
+    def id(self) -> int:
+        return self._id
+
+    def filename(self) -> str:
+        return f"{self._name}.kpp"
+
+    def image(self) -> QImage:
+        return self._image
+
+
+class Notifier(QObject):
+    """Krita application notifier."""
+
+    viewCreated = Signal(object)
+    viewClosed = Signal(object)
+    windowCreated = Signal()
+    windowIsBeingCreated = Signal(object)
+    applicationClosing = Signal()
+    configurationChanged = Signal()
+
+    def setActive(self, value: bool) -> None:
+        pass
+
+
+class KoToolBox(QWidget):
+    """Widget holding tool buttons, as found in Krita's ToolBox docker."""
+
+
+class KoToolBoxButton(QToolButton):
+    """Button activating a single tool."""
+
+
+class Viewport(QWidget):
+    """Canvas widget of a view."""
+
+
+class View:
+    """Krita view. Brush settings are shared by all views of a window."""
+
+    def __init__(self, window: 'Window', subwindow) -> None:
+        self._window = window
+        self.subwindow = subwindow
+
+    def window(self) -> 'Window':
+        return self._window
+
+    def currentBrushPreset(self) -> Optional[Resource]:
+        return self._window.brush["preset"]
+
+    def setCurrentBrushPreset(self, preset: Resource) -> None:
+        self._window.brush["preset"] = preset
+
+    def paintingOpacity(self) -> float:
+        return self._window.brush["opacity"]
+
+    def setPaintingOpacity(self, opacity: float) -> None:
+        self._window.brush["opacity"] = opacity
+
+    def paintingFlow(self) -> float:
+        return self._window.brush["flow"]
+
+    def setPaintingFlow(self, flow: float) -> None:
+        self._window.brush["flow"] = flow
+
+    def brushSize(self) -> float:
+        return self._window.brush["size"]
+
+    def setBrushSize(self, size: float) -> None:
+        self._window.brush["size"] = size
+
+
+class Window(QObject):
+    """
+    Krita main window.
+
+    `widget_count` filler widgets are nested under the main window, to
+    give hierarchy walks a realistic amount of objects to go through.
+    """
+
+    activeViewChanged = Signal()
+    windowClosed = Signal()
+    themeChanged = Signal()
+
+    def __init__(self, krita: 'Krita', widget_count: int) -> None:
+        super().__init__()
+        self._krita = krita
+        self._qwindow = QMainWindow()
+        self._qwindow.setObjectName("MainWindow#1")
+        self._mdi_area = QMdiArea(self._qwindow)
+        self._qwindow.setCentralWidget(self._mdi_area)
+        self._views: List[View] = []
+        self.brush: Dict[str, object] = {
+            "preset": next(iter(krita.presets.values()), None),
+            "opacity": 1.0,
+            "flow": 1.0,
+            "size": 40.0,
+        }
+
+        toolbar = QToolBar(self._qwindow)
+        toolbar.setObjectName("BrushesAndStuff")
+        eraser_button = QToolButton(toolbar)
+        eraser_button.setDefaultAction(krita.action("erase_action"))
+        krita.toolbox_docker.setParent(self._qwindow)
+        _add_filler_widgets(self._qwindow, widget_count)
+
+    def qwindow(self) -> QMainWindow:
+        return self._qwindow
+
+    def views(self) -> List[View]:
+        return list(self._views)
+
+    def activeView(self) -> Optional[View]:
+        subwindow = self._mdi_area.activeSubWindow()
+        for view in self._views:
+            if view.subwindow is subwindow:
+                return view
+        return None
+
+    def addView(self) -> View:
+        """Open a new view and make it active."""
+        canvas = QWidget()
+        Viewport(canvas)
+        subwindow = self._mdi_area.addSubWindow(canvas)
+        view = View(self, subwindow)
+        self._views.append(view)
+        self.showView(view)
+        self._krita.notifier().viewCreated.emit(view)
+        return view
+
+    def showView(self, view: View) -> None:
+        self._mdi_area.setActiveSubWindow(view.subwindow)
+        self.activeViewChanged.emit()
+
+    def createAction(self, name: str, text: str = "",
+                     menu: str = "") -> QAction:
+        action = self._krita.action(name) or self._krita.create_action(name)
+        action.setText(text or name)
+        return action
+
+
+class Krita(QObject):
+    """Krita application. Use `Krita.instance()` to get it."""
+
+    _instance: Optional['Krita'] = None
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._actions: Dict[str, QAction] = {}
+        self._settings: Dict[tuple, str] = {}
+        self._notifier = Notifier()
+        self._windows: List[Window] = []
+        self.presets: Dict[str, Resource] = {}
+        self.extensions: List[Extension] = []
+        self.app_data_location = ""
+        self.create_action("erase_action").setCheckable(True)
+        self.toolbox_docker = self._create_toolbox()
+
+    @classmethod
+    def instance(cls) -> 'Krita':
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def set_preset_count(self, count: int) -> None:
+        """Replace the preset library with `count` synthetic presets."""
+        self.presets = {
+            f"Preset {i:05d}": Resource(f"Preset {i:05d}", i)
+            for i in range(count)}
+
+    def create_window(self, view_count: int = 1,
+                      widget_count: int = 0) -> Window:
+        window = Window(self, widget_count)
+        self._windows.append(window)
+        self._notifier.windowCreated.emit()
+        for _ in range(view_count):
+            window.addView()
+        return window
+
+    def create_action(self, name: str) -> QAction:
+        action = QAction(name, self)
+        action.setObjectName(name)
+        self._actions[name] = action
+        return action
+
+    def _create_toolbox(self) -> QDockWidget:
+        docker = QDockWidget()
+        docker.setObjectName("ToolBox")
+        toolbox = KoToolBox(docker)
+        docker.setWidget(toolbox)
+        group = QButtonGroup(toolbox)
+        for tool_name in TOOLS:
+            button = KoToolBoxButton(toolbox)
+            button.setObjectName(tool_name)
+            button.setCheckable(True)
+            group.addButton(button)
+            self.create_action(tool_name).triggered.connect(button.click)
+        toolbox.findChild(KoToolBoxButton, TOOLS[0]).setChecked(True)
+        return docker
+
+    # Krita API
+
+    def action(self, name: str) -> Optional[QAction]:
+        return self._actions.get(name)
+
+    def actions(self) -> List[QAction]:
+        return list(self._actions.values())
+
+    def addExtension(self, extension: Extension) -> None:
+        self.extensions.append(extension)
+
+    def activeWindow(self) -> Optional[Window]:
+        return self._windows[-1] if self._windows else None
+
+    def windows(self) -> List[Window]:
+        return list(self._windows)
+
+    def activeDocument(self) -> None:
+        return None
+
+    def notifier(self) -> Notifier:
+        return self._notifier
+
+    def dockers(self) -> List[QDockWidget]:
+        return [self.toolbox_docker]
+
+    def resources(self, resource_type: str) -> Dict[str, Resource]:
+        if resource_type == "preset":
+            return dict(self.presets)
+        return {}
+
+    def readSetting(self, group: str, name: str, default: str) -> str:
+        return self._settings.get((group, name), default)
+
+    def writeSetting(self, group: str, name: str, value: str) -> None:
+        self._settings[(group, name)] = value
+
+    def icon(self, name: str) -> QIcon:
+        return QIcon()
+
+    def getAppDataLocation(self) -> str:
+        return self.app_data_location
+
+
+def _add_filler_widgets(parent: QWidget, count: int) -> None:
+    """Nest `count` widgets under parent, 10 children per widget."""
+    queue = [parent]
+    created = 0
+    while created < count:
+        widget = QWidget(queue[0])
+        widget.setObjectName(f"filler{created}")
+        queue.append(widget)
+        created += 1
+        if created % 10 == 0:
+            queue.pop(0)
+
+
+def install() -> Krita:
+    """Register this module as `krita` and return the Krita instance."""
+    from qtpy.QtWidgets import QApplication
+    if QApplication.instance() is None:
+        sys.modules[__name__].__dict__["_app"] = QApplication([])
+    sys.modules["krita"] = sys.modules[__name__]
+    return Krita.instance()
@@ -0,0 +1,332 @@
+"""
+Benchmarks of the plugin's hot paths, run against a headless fake krita.
+
+Every benchmark reports one number which is compared with the stored
+baseline. The run fails when any of them regressed by more than the
+tolerance. Run from the repository root:
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --update-baseline
+
+Requires PyQt5 and the qtpy submodule (`git submodule update --init`).
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+from typing import Callable, Dict, List, NamedTuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "separatebrusheraser", "qtpy"))
+
+import fake_krita  # noqa: E402
+
+
+class Result(NamedTuple):
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+class Harness:
+    """Fake krita with the plugin loaded into it, ready to be benchmarked."""
+
+    def __init__(self, preset_count: int, widget_count: int) -> None:
+        self.krita = fake_krita.install()
+        self.krita.app_data_location = tempfile.mkdtemp()
+        self.krita.set_preset_count(preset_count)
+
+        import separatebrusheraser  # noqa: F401
+        from separatebrusheraser.api_krita import Krita as KritaAPI
+        self.api = KritaAPI
+
+        self.extension = self.krita.extensions[0]
+        self.window = self.krita.create_window(
+            view_count=0, widget_count=widget_count)
+        self.extension.setup()
+        self.extension.createActions(self.window)
+        self.window.addView()
+        # Let the extension finish its delayed initialization
+        self.spin(0.7)
+
+    def spin(self, seconds: float) -> None:
+        from qtpy.QtCore import QEventLoop, QTimer
+        loop = QEventLoop()
+        QTimer.singleShot(int(seconds * 1000), loop.quit)
+        loop.exec_()
+
+    def process_events(self) -> None:
+        from qtpy.QtWidgets import QApplication
+        QApplication.processEvents()
+
+
+def ops_per_second(
+    harness: Harness,
+    operation: Callable[[int], None],
+    duration: float = 0.3,
+    repeats: int = 3,
+) -> Result:
+    """Return best rate of running `operation(i)` over a few runs."""
+    best = 0.0
+    for _ in range(repeats):
+        calls = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            for _ in range(50):
+                operation(calls)
+                calls += 1
+            harness.process_events()
+        best = max(best, calls / (time.perf_counter() - start))
+    return Result(best, "ops/s", True)
+
+
+def idle_cpu(harness: Harness, seconds: float = 1.0) -> Result:
+    """Return CPU milliseconds used per second while nothing happens."""
+    start = time.process_time()
+    harness.spin(seconds)
+    return Result(
+        (time.process_time() - start) * 1000 / seconds, "cpu ms/s", False)
+
+
+def bench_brush_eraser_switch(harness: Harness) -> Result:
+    extension = harness.extension
+
+    def switch(i: int) -> None:
+        if i % 2:
+            extension.activate_eraser()
+        else:
+            extension.activate_brush()
+    return ops_per_second(harness, switch)
+
+
+def bench_action_trigger(harness: Harness) -> Result:
+    """Same switch through the plugin's QActions, as a shortcut runs it."""
+    actions = [harness.krita.action("dninosores_activate_brush"),
+               harness.krita.action("dninosores_activate_eraser")]
+    return ops_per_second(harness, lambda i: actions[i % 2].trigger())
+
+
+def bench_verify_eraser_state(harness: Harness) -> Result:
+    return ops_per_second(
+        harness, lambda _: harness.extension.verify_eraser_state())
+
+
+def bench_key_event_filter(harness: Harness, extra_handlers: int = 0) \
+        -> Result:
+    from qtpy.QtCore import QEvent, Qt
+    from qtpy.QtGui import QKeyEvent
+    harness.extension.set_line_modifier("Shift")
+    viewport = harness.window.qwindow().findChild(fake_krita.Viewport)
+    event = QKeyEvent(QEvent.KeyPress, Qt.Key_A, Qt.NoModifier)
+    event_filter = harness.extension.filter
+    handlers = [(QEvent.KeyPress, lambda _: None, Qt.Key_F1 + i)
+                for i in range(extra_handlers)]
+    for handler in handlers:
+        event_filter.register(*handler)
+    try:
+        return ops_per_second(
+            harness, lambda _: event_filter.eventFilter(viewport, event))
+    finally:
+        for handler in handlers:
+            event_filter.unregister(*handler)
+
+
+def bench_line_modifier_key(harness: Harness) -> Result:
+    """Press and release of the line modifier key, switching the tool."""
+    from qtpy.QtCore import QEvent, Qt
+    from qtpy.QtGui import QKeyEvent
+    from separatebrusheraser.api_krita.enums import Tool
+    harness.extension.set_line_modifier("Shift")
+    harness.api.active_tool = Tool.FREEHAND_BRUSH
+    viewport = harness.window.qwindow().findChild(fake_krita.Viewport)
+    events = [QKeyEvent(QEvent.KeyPress, Qt.Key_Shift, Qt.ShiftModifier),
+              QKeyEvent(QEvent.KeyRelease, Qt.Key_Shift, Qt.NoModifier)]
+    event_filter = harness.extension.filter
+    # Every run ends on a release, back on the freehand brush
+    return ops_per_second(
+        harness, lambda i: event_filter.eventFilter(viewport, events[i % 2]))
+
+
+def bench_active_tool(harness: Harness) -> Result:
+    return ops_per_second(harness, lambda _: harness.api.active_tool)
+
+
+def bench_get_eraser_button(harness: Harness) -> Result:
+    return ops_per_second(
+        harness, lambda _: harness.extension.get_eraser_button())
+
+
+def bench_preset_lookup(harness: Harness) -> Result:
+    names = list(harness.krita.presets)[:2]
+
+    def set_preset(i: int) -> None:
+        harness.api.get_active_view().brush_preset = names[i % 2]
+    return ops_per_second(harness, set_preset)
+
+
+def synthetic_tree(size: int):
+    """Return root of `size` QObjects nested 10 children per object."""
+    from qtpy.QtCore import QObject
+    root = QObject()
+    queue = [root]
+    for i in range(size - 1):
+        obj = QObject(queue[0])
+        obj.setObjectName(f"node{i}")
+        queue.append(obj)
+        if len(queue[0].children()) == 10:
+            queue.pop(0)
+    return root
+
+
+def dispose(root) -> None:
+    """Destroy a synthetic tree now rather than at interpreter exit."""
+    from qtpy.QtCore import QCoreApplication, QEvent
+    root.deleteLater()
+    QCoreApplication.sendPostedEvents(root, QEvent.DeferredDelete)
+
+
+def bench_find_object(size: int, harness: Harness) -> Result:
+    """Lookup of the last object by name, as the plugin's queries run it."""
+    from separatebrusheraser.api_krita.pyqt import find_object
+    root = synthetic_tree(size)
+    name = f"node{size - 2}"
+    result = ops_per_second(
+        harness, lambda _: find_object(root, object_name=name))
+    dispose(root)
+    return result
+
+
+def bench_index_lookup(size: int, harness: Harness) -> Result:
+    """Same lookup through the object index, after the first one."""
+    from separatebrusheraser.api_krita.pyqt import ObjectIndex
+    root = synthetic_tree(size)
+    name = f"node{size - 2}"
+    index = ObjectIndex()
+    result = ops_per_second(
+        harness, lambda _: index.find(root, object_name=name))
+    dispose(root)
+    return result
+
+
+def bench_idle_polling(harness: Harness) -> Result:
+    """Idle cost of the 1 ms verify timer the plugin used to run."""
+    from qtpy.QtCore import QTimer
+    timer = QTimer()
+    timer.timeout.connect(harness.extension.verify_eraser_state)
+    timer.start(1)
+    try:
+        return idle_cpu(harness)
+    finally:
+        timer.stop()
+
+
+def bench_idle_event_driven(harness: Harness) -> Result:
+    return idle_cpu(harness)
+
+
+BENCHMARKS: Dict[str, Callable[[Harness], Result]] = {
+    "activate_brush/activate_eraser": bench_brush_eraser_switch,
+    "activate_brush/activate_eraser (QAction.trigger)":
+        bench_action_trigger,
+    "verify_eraser_state": bench_verify_eraser_state,
+    "KeyEventDispatcher.eventFilter": bench_key_event_filter,
+    "KeyEventDispatcher.eventFilter, 100 handlers":
+        partial(bench_key_event_filter, extra_handlers=100),
+    "KeyEventDispatcher.eventFilter, line modifier press/release":
+        bench_line_modifier_key,
+    "ToolDescriptor.__get__": bench_active_tool,
+    "get_eraser_button": bench_get_eraser_button,
+    "View.brush_preset (preset lookup)": bench_preset_lookup,
+    "idle, 1 ms polling timer": bench_idle_polling,
+    "idle, event-driven sync": bench_idle_event_driven,
+}
+for _size in (1000, 10000, 100000):
+    BENCHMARKS.update({
+        f"find_object, {_size} objects": partial(bench_find_object, _size),
+        f"ObjectIndex lookup, {_size} objects":
+            partial(bench_index_lookup, _size),
+    })
+
+
+def compare(name: str, result: Result, baseline: dict,
+            tolerance: float) -> str:
+    """Return a regression description or an empty string."""
+    stored = baseline.get(name)
+    if stored is None:
+        return ""
+    reference = stored["value"]
+    if result.higher_is_better:
+        if result.value < reference * (1 - tolerance):
+            return f"{result.value:.1f} < {reference:.1f} {result.unit}"
+    # Idle costs are close to zero, allow for a millisecond of noise
+    elif result.value > reference * (1 + tolerance) + 1:
+        return f"{result.value:.1f} > {reference:.1f} {result.unit}"
+    return ""
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--presets", type=int, default=10000,
+                        help="number of presets in the fake library")
+    parser.add_argument("--widgets", type=int, default=2000,
+                        help="number of filler widgets in the main window")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="allowed relative regression")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store results as the new baseline")
+    parser.add_argument("benchmarks", nargs="*",
+                        help="names of benchmarks to run (default: all)")
+    args = parser.parse_args(argv)
+
+    config = {"presets": args.presets, "widgets": args.widgets}
+    baseline: dict = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as baseline_file:
+            stored = json.load(baseline_file)
+        if stored.get("config") == config:
+            baseline = stored["results"]
+        else:
+            print("Baseline was recorded with another configuration, "
+                  "results are not compared.")
+
+    harness = Harness(args.presets, args.widgets)
+    results: Dict[str, Result] = {}
+    regressions = []
+    for name, benchmark in BENCHMARKS.items():
+        if args.benchmarks and name not in args.benchmarks:
+            continue
+        result = results[name] = benchmark(harness)
+        regression = compare(name, result, baseline, args.tolerance)
+        if regression:
+            regressions.append(f"{name}: {regression}")
+        print(f"{name:<45} {result.value:>14.1f} {result.unit:<9}"
+              f"{'  REGRESSION' if regression else ''}")
+
+    if args.update_baseline:
+        stored_results = dict(baseline)
+        stored_results.update(
+            {name: result._replace(value=round(result.value, 1))._asdict()
+             for name, result in results.items()})
+        with open(BASELINE_PATH, "w", encoding="utf-8") as baseline_file:
+            json.dump({"config": config, "results": stored_results},
+                      baseline_file, indent=4)
+            baseline_file.write("\n")
+        return 0
+
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -5,4 +5,7 @@ _qtpy_outer = os.path.join(_here, "qtpy")  # this should contain the inner qtpy
 if _qtpy_outer not in sys.path:
     sys.path.insert(0, _qtpy_outer)
 
-from .separatebrusheraser import *
+from .startup import startup_report
+
+with startup_report.timing_imports(__name__):
+    from .separatebrusheraser import *
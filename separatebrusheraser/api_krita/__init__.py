@@ -10,6 +10,9 @@ packages.
 
 Other api elements that require importing from other packages are
 available here so that the imports to omit unresolved warnings there.
+
+Every module shares the one `Krita` instance. The wrappers and indexes
+behind it are imported the first time they are used.
 """
 
 from krita import Extension
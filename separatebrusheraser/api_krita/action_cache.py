@@ -0,0 +1,69 @@
+from krita import Krita as Api
+from functools import partial
+from typing import Dict, Optional
+
+from qtpy.QtWidgets import QAction, QApplication
+
+
+class ActionRegistry:
+    """
+    Resolves krita actions by name once and keeps their handles.
+
+    Krita looks actions up in the action collection of its current main
+    window, so the handles are dropped whenever the focused window
+    changes. Handles of actions deleted by C++ are dropped as soon as
+    their `destroyed` signal arrives, so a stored handle is always alive.
+
+    `hits` and `misses` count lookups served from the cache and lookups
+    that had to ask krita.
+    """
+
+    def __init__(self) -> None:
+        self._actions: Dict[str, QAction] = {}
+        self._window_tracking = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str) -> Optional[QAction]:
+        """Return krita action called `name` or None if it does not exist."""
+        action = self._actions.get(name)
+        if action is not None:
+            self.hits += 1
+            return action
+
+        self.misses += 1
+        self._ensure_window_tracking()
+        action = Api.instance().action(name)
+        if action is not None:
+            # Missing actions are not cached, as they can be created later
+            self._actions[name] = action
+            action.destroyed.connect(partial(self._forget, name))
+        return action
+
+    def clear(self, *_) -> None:
+        """Drop all handles. They will be resolved again on next use."""
+        self._actions.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return lookup counters along with the number of cached handles."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached": len(self._actions),
+        }
+
+    def _forget(self, name: str, *_) -> None:
+        self._actions.pop(name, None)
+
+    def _ensure_window_tracking(self) -> None:
+        """Clear the cache when focus moves to another window."""
+        if self._window_tracking:
+            return
+        app = QApplication.instance()
+        if app is not None:
+            app.focusWindowChanged.connect(self.clear)
+            self._window_tracking = True
+
+
+action_registry = ActionRegistry()
+"""Process-wide cache of krita action handles."""
@@ -1,6 +1,11 @@
 # SPDX-FileCopyrightText: © 2022-2023 Wojciech Trybus <wojtryb@gmail.com>
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from .transform_actions import TransformModeActions, TransformModeFinder
+from ..lazy_import import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "TransformModeActions": "transform_actions",
+    "TransformModeFinder": "transform_actions",
+})
 
 __all__ = ["TransformModeActions", "TransformModeFinder"]
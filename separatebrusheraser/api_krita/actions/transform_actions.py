@@ -13,9 +13,7 @@ from qtpy.QtWidgets import (
 )
 
 from ..enums import Tool, TransformMode
-from ..core_api import KritaInstance
-
-Krita = KritaInstance()
+from .. import Krita
 
 
 class TransformModeActions:
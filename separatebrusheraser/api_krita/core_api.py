@@ -6,18 +6,14 @@ from typing import Callable, Protocol, Any, Dict, Optional
 
 from qtpy import QtWidgets
 from qtpy.QtWidgets import (QMainWindow, QWidgetAction,
-                            QMdiArea)
+                            QMdiArea, QAction)
 from qtpy.QtGui import QGuiApplication
 from qtpy.QtGui import QKeySequence, QColor, QIcon
 from qtpy.QtCore import QTimer
 
-from .wrappers import (
-    ToolDescriptor,
-    Document,
-    Canvas,
-    Cursor,
-    View,
-)
+from .action_cache import action_registry
+from . import wrappers
+from .wrappers import ToolDescriptor
 
 
 class KritaInstance:
@@ -35,37 +31,51 @@ class KritaInstance:
         screen = app.primaryScreen() if app else None
         self.screen_size = screen.geometry().width() if screen else 0
 
-    def get_active_view(self) -> View:
+    def get_active_view(self) -> 'wrappers.View':
         """Return wrapper of krita `View`."""
-        return View(self.instance.activeWindow().activeView())
+        return wrappers.View(self.instance.activeWindow().activeView())
 
-    def get_active_document(self) -> Optional[Document]:
+    def get_active_document(self) -> Optional['wrappers.Document']:
         """Return wrapper of krita `Document`."""
         document = self.instance.activeDocument()
         if document is None:
             return None
-        return Document(document)
+        return wrappers.Document(document)
 
-    def get_active_canvas(self) -> Canvas:
+    def get_active_canvas(self) -> 'wrappers.Canvas':
         """Return wrapper of krita `Canvas`."""
-        return Canvas(self.instance.activeWindow().activeView().canvas())
+        return wrappers.Canvas(
+            self.instance.activeWindow().activeView().canvas())
 
-    def get_cursor(self) -> Cursor:
+    def get_cursor(self) -> 'wrappers.Cursor':
         """Return wrapper of krita `Cursor`. Don't use on plugin init phase."""
         qwin = self.get_active_qwindow()
-        return Cursor(qwin)
+        return wrappers.Cursor(qwin)
+
+    def get_action(self, action_name: str) -> Optional[QAction]:
+        """Return cached handle of krita action called `action_name`."""
+        return action_registry.get(action_name)
+
+    def get_action_stats(self) -> Dict[str, int]:
+        """Return hit and miss counters of the action handle cache."""
+        return action_registry.stats()
 
     def trigger_action(self, action_name: str) -> None:
         """Trigger internal krita action called `action_name`."""
-        return self.instance.action(action_name).trigger()
+        return action_registry.get(action_name).trigger()
 
     def get_action_shortcut(self, action_name: str) -> QKeySequence:
         """Return shortcut of krita action called `action_name`."""
-        return self.instance.action(action_name).shortcut()
+        return action_registry.get(action_name).shortcut()
 
     def get_presets(self) -> Dict[str, Any]:
-        """Return a list of unwrapped preset objects"""
-        return self.instance.resources('preset')
+        """
+        Return a dict of unwrapped preset objects by their names.
+
+        The dict is shared by the whole plugin and must not be modified.
+        """
+        from .preset_index import preset_index
+        return preset_index.presets()
 
     def get_active_qwindow(self) -> QMainWindow:
         """Return qt window of krita. Don't use on plugin init phase."""
@@ -74,6 +84,10 @@ class KritaInstance:
     def get_active_mdi_area(self) -> QMdiArea:
         return self.get_active_qwindow().findChild(QMdiArea)  # type: ignore
 
+    def get_app_data_location(self) -> str:
+        """Return path of krita profile folder holding user resources."""
+        return self.instance.getAppDataLocation()
+
     def get_icon(self, icon_name: str) -> QIcon:
         return self.instance.icon(icon_name)
 
@@ -1,9 +1,10 @@
 # SPDX-FileCopyrightText: © 2022-2023 Wojciech Trybus <wojtryb@gmail.com>
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from krita import Krita as Api
 from enum import Enum
 
+from ..action_cache import action_registry
+
 
 class Toggle(Enum):
     """
@@ -34,12 +35,12 @@ class Toggle(Enum):
     @property
     def state(self) -> bool:
         """Return state of checkable krita action called `action_name`."""
-        return Api.instance().action(self.value).isChecked()
+        return action_registry.get(self.value).isChecked()
 
     @state.setter
     def state(self, state: bool) -> None:
         """Set state of checkable krita action (toggle) by its enum."""
-        return Api.instance().action(self.value).setChecked(state)
+        return action_registry.get(self.value).setChecked(state)
 
     def switch_state(self) -> None:
         """Change state from ON to OFF and vice-versa."""
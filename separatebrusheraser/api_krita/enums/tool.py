@@ -1,11 +1,12 @@
 # SPDX-FileCopyrightText: © 2022-2023 Wojciech Trybus <wojtryb@gmail.com>
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from krita import Krita as Api
 from enum import Enum
 
 from qtpy.QtGui import QIcon
 
+from ..action_cache import action_registry
+
 
 class Tool(Enum):
     """
@@ -54,7 +55,7 @@ class Tool(Enum):
     PAN = "PanTool"
 
     def activate(self):
-        Api.instance().action(self.value).trigger()
+        action_registry.get(self.value).trigger()
 
     @staticmethod
     def is_paintable(tool: 'Tool') -> bool:
@@ -64,7 +65,7 @@ class Tool(Enum):
     @property
     def icon(self) -> QIcon:
         """Return the icon of this tool."""
-        return Api.instance().action(self.value).icon()
+        return action_registry.get(self.value).icon()
 
     @property
     def pretty_name(self) -> str:
@@ -6,6 +6,8 @@ from enum import Enum
 
 from qtpy.QtGui import QIcon
 
+from ..action_cache import action_registry
+
 
 class TransformMode(Enum):
     """
@@ -25,7 +27,7 @@ class TransformMode(Enum):
 
     def activate(self) -> None:
         """Use krita action created by TransformModeActions to set mode."""
-        Api.instance().action(self.value).trigger()
+        action_registry.get(self.value).trigger()
 
     @property
     def button_name(self) -> str:
@@ -0,0 +1,69 @@
+from krita import Krita as Api
+from typing import Any, Dict, Optional, Tuple
+
+from .preset_snapshot import PresetRecord, preset_metadata
+from .wrappers.database import (
+    FileSignature,
+    database_signature,
+    resource_database_path,
+)
+
+
+class PresetIndex:
+    """
+    Process-wide map of preset names to krita preset resources.
+
+    Asking krita for `resources('preset')` builds a new dict of every
+    preset, which stalls with big libraries. The map is built once and
+    reused until the resource database changes on disk (which krita
+    does whenever a resource is added, removed or modified), or until
+    `invalidate()` is called.
+
+    Until the map is built, name checks and metadata come from the preset
+    snapshot instead, so they never make krita build it.
+    """
+
+    def __init__(self) -> None:
+        self._presets: Optional[Dict[str, Any]] = None
+        self._signature: Tuple[FileSignature, ...] = ()
+        self._database_path: Optional[str] = None
+        self.builds = 0
+
+    def presets(self) -> Dict[str, Any]:
+        """Return up to date dict mapping preset names to resources."""
+        signature = self._database_signature()
+        if self._presets is None or signature != self._signature:
+            self._presets = Api.instance().resources('preset')
+            self._signature = signature
+            self.builds += 1
+        return self._presets
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return preset resource called `name` or None if there is none."""
+        return self.presets().get(name)
+
+    def __contains__(self, name: str) -> bool:
+        if self._presets is None:
+            snapshot = preset_metadata.current()
+            if snapshot is not None:
+                return name in snapshot
+        return name in self.presets()
+
+    def metadata(self, name: str) -> Optional[PresetRecord]:
+        """Return snapshot metadata of preset `name`, None if unavailable."""
+        snapshot = preset_metadata.current()
+        return snapshot.get(name) if snapshot is not None else None
+
+    def invalidate(self) -> None:
+        """Force the map to be rebuilt on next use."""
+        self._presets = None
+
+    def _database_signature(self) -> Tuple[FileSignature, ...]:
+        """Return mtime and size of the database and its write-ahead log."""
+        if self._database_path is None:
+            self._database_path = resource_database_path()
+        return database_signature(self._database_path)
+
+
+preset_index = PresetIndex()
+"""Preset map shared by every part of the plugin."""
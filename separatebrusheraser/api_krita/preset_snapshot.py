@@ -0,0 +1,315 @@
+from krita import Krita as Api
+import mmap
+import os
+import struct
+from concurrent.futures import Future
+from functools import partial
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .wrappers.database import (
+    Database,
+    FileSignature,
+    database_signature,
+    resource_database_path,
+)
+from .wrappers.database_reader import Rows
+
+_MAGIC = b"SBEP"
+_VERSION = 1
+# magic, version, database and WAL signatures, preset, tag and storage
+# counts, length of the tag reference array, offset of the string blob
+_HEADER = struct.Struct("<4sI4q5I")
+# resource id, name, md5 (offset and length in the string blob), storage
+# index, first tag reference and tag count
+_RECORD = struct.Struct("<q7I")
+_RECORD_NAME = struct.Struct("<8xII")
+_STRING = struct.Struct("<II")
+_INDEX = struct.Struct("<I")
+# Separator of tag names joined in one column by the metadata query
+_TAG_SEPARATOR = "\x1f"
+
+
+class PresetRecord(NamedTuple):
+    """Metadata of a single preset stored in the snapshot."""
+
+    name: str
+    resource_id: int
+    md5: str
+    storage: str
+    tags: Tuple[str, ...]
+
+
+class PresetSnapshot:
+    """
+    Read-only, memory-mapped view of a preset metadata snapshot file.
+
+    Records are sorted by the UTF-8 bytes of preset names, so a lookup is
+    a binary search over the mapped file. Nothing is parsed up front and
+    only the records which are looked up are ever decoded.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_header()
+        except (ValueError, struct.error):
+            self._map.close()
+            raise
+
+    @classmethod
+    def open(cls, path: str) -> Optional['PresetSnapshot']:
+        """Return snapshot stored at `path` or None if it is unusable."""
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def _read_header(self) -> None:
+        (magic, version, *signature, self._count, tag_count, storage_count,
+         tag_ref_count, self._strings) = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a preset snapshot of this version")
+        self.signature: Tuple[FileSignature, ...] = tuple(
+            None if mtime < 0 else (mtime, size)
+            for mtime, size in zip(signature[::2], signature[1::2]))
+
+        self._records = _HEADER.size
+        self._tags = self._records + self._count * _RECORD.size
+        self._storages = self._tags + tag_count * _STRING.size
+        self._tag_refs = self._storages + storage_count * _STRING.size
+        self._tag_count = tag_count
+        if self._tag_refs + tag_ref_count * _INDEX.size > self._strings \
+                or self._strings > len(self._map):
+            raise ValueError("Truncated preset snapshot")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, name: str) -> bool:
+        return self._find(name) >= 0
+
+    def get(self, name: str) -> Optional[PresetRecord]:
+        """Return metadata of preset called `name` or None."""
+        position = self._find(name)
+        return self._record(position) if position >= 0 else None
+
+    def names(self) -> Iterator[str]:
+        """Iterate over names of all presets."""
+        for position in range(self._count):
+            offset, length = _RECORD_NAME.unpack_from(
+                self._map, self._records + position * _RECORD.size)
+            yield self._string(offset, length)
+
+    def tags(self) -> List[str]:
+        """Return names of all tags with presets."""
+        return [self._table_string(self._tags, index)
+                for index in range(self._tag_count)]
+
+    def tag_pairs(self) -> Iterator[Tuple[str, str]]:
+        """Iterate over (tag, preset) name pairs."""
+        tags = self.tags()
+        for position in range(self._count):
+            _, name_offset, name_length, _, _, _, first, count = \
+                _RECORD.unpack_from(
+                    self._map, self._records + position * _RECORD.size)
+            name = self._string(name_offset, name_length)
+            for tag in self._tag_indices(first, count):
+                yield tags[tag], name
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._map.close()
+
+    def _find(self, name: str) -> int:
+        """Return position of record called `name` or -1."""
+        key = name.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset, length = _RECORD_NAME.unpack_from(
+                self._map, self._records + middle * _RECORD.size)
+            start = self._strings + offset
+            current = self._map[start:start + length]
+            if current < key:
+                low = middle + 1
+            elif current > key:
+                high = middle
+            else:
+                return middle
+        return -1
+
+    def _record(self, position: int) -> PresetRecord:
+        (resource_id, name_offset, name_length, md5_offset, md5_length,
+         storage, first, count) = _RECORD.unpack_from(
+            self._map, self._records + position * _RECORD.size)
+        return PresetRecord(
+            self._string(name_offset, name_length),
+            resource_id,
+            self._string(md5_offset, md5_length),
+            self._table_string(self._storages, storage),
+            tuple(self._table_string(self._tags, tag)
+                  for tag in self._tag_indices(first, count)))
+
+    def _tag_indices(self, first: int, count: int) -> Iterator[int]:
+        for position in range(first, first + count):
+            yield _INDEX.unpack_from(
+                self._map, self._tag_refs + position * _INDEX.size)[0]
+
+    def _table_string(self, table: int, index: int) -> str:
+        return self._string(*_STRING.unpack_from(
+            self._map, table + index * _STRING.size))
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings + offset
+        return self._map[start:start + length].decode("utf-8")
+
+
+class _StringTable:
+    """Blob of UTF-8 strings, each stored once."""
+
+    def __init__(self) -> None:
+        self.blob = bytearray()
+        self._offsets: Dict[bytes, int] = {}
+
+    def add(self, text: Optional[str]) -> Tuple[int, int]:
+        """Return offset and length of `text` in the blob."""
+        encoded = (text or "").encode("utf-8")
+        offset = self._offsets.get(encoded)
+        if offset is None:
+            offset = self._offsets[encoded] = len(self.blob)
+            self.blob += encoded
+        return offset, len(encoded)
+
+
+def encode_snapshot(signature: Tuple[FileSignature, ...], rows: Rows) -> bytes:
+    """
+    Return snapshot file content of preset metadata rows.
+
+    Rows hold resource id, name, md5, storage location and tag names
+    joined with a unit separator, as returned by the metadata query.
+    When names repeat, the last row wins, as in krita's own preset map.
+    """
+    presets = {row[1]: row for row in rows}
+    strings = _StringTable()
+    tags: Dict[str, int] = {}
+    storages: Dict[str, int] = {}
+    records = bytearray()
+    tag_refs = bytearray()
+    tag_ref_count = 0
+
+    for name in sorted(presets, key=lambda name: name.encode("utf-8")):
+        resource_id, _, md5, storage, joined_tags = presets[name]
+        tag_names = dict.fromkeys(
+            joined_tags.split(_TAG_SEPARATOR) if joined_tags else ())
+        for tag in tag_names:
+            tag_refs += _INDEX.pack(tags.setdefault(tag, len(tags)))
+        records += _RECORD.pack(
+            resource_id, *strings.add(name), *strings.add(md5),
+            storages.setdefault(storage or "", len(storages)),
+            tag_ref_count, len(tag_names))
+        tag_ref_count += len(tag_names)
+
+    tables = bytearray()
+    for table in (tags, storages):
+        for text in table:
+            tables += _STRING.pack(*strings.add(text))
+
+    flat_signature = [value for file_signature in signature
+                      for value in (file_signature or (-1, -1))]
+    strings_offset = (_HEADER.size + len(records) + len(tables)
+                      + len(tag_refs))
+    header = _HEADER.pack(
+        _MAGIC, _VERSION, *flat_signature, len(presets), len(tags),
+        len(storages), tag_ref_count, strings_offset)
+    return bytes(header + records + tables + tag_refs + strings.blob)
+
+
+def _write_snapshot(
+    path: str,
+    signature: Tuple[FileSignature, ...],
+    rows: Rows,
+) -> str:
+    """Write snapshot of rows next to `path` and return the new file."""
+    new_path = path + ".new"
+    with open(new_path, "wb") as file:
+        file.write(encode_snapshot(signature, rows))
+    return new_path
+
+
+class PresetMetadata:
+    """
+    Process-wide preset metadata kept in a snapshot in the profile folder.
+
+    Name, resource id, md5, storage and tags of every preset are written
+    to a compact binary file, which later sessions memory-map and use
+    right away instead of asking krita or querying the database.
+
+    The snapshot is valid as long as the signature of the resource
+    database it was built from matches. When it does not, a new one is
+    built on the database reader thread, written to disk there, and
+    swapped in on the GUI thread.
+    """
+
+    FILE_NAME = "separatebrusheraser_presets.bin"
+
+    def __init__(self) -> None:
+        self._snapshot: Optional[PresetSnapshot] = None
+        self._opened = False
+        self._pending: Optional[Future] = None
+        self._database_path: Optional[str] = None
+        self.writes = 0
+
+    def path(self) -> str:
+        """Return path of the snapshot file."""
+        return os.path.join(Api.instance().getAppDataLocation(),
+                            self.FILE_NAME)
+
+    def current(self) -> Optional[PresetSnapshot]:
+        """
+        Return the snapshot if it matches the resource database.
+
+        Otherwise start building a new one and return None.
+        """
+        if not self._opened:
+            self._opened = True
+            self._snapshot = PresetSnapshot.open(self.path())
+        snapshot = self._snapshot
+        if snapshot is not None \
+                and snapshot.signature == self._current_signature():
+            return snapshot
+        self.refresh_async()
+        return None
+
+    def refresh_async(self) -> None:
+        """Build the snapshot again on the database reader thread."""
+        if self._pending is not None and not self._pending.done():
+            return
+        signature = self._current_signature()
+        if signature[0] is None:
+            return
+        path = self.path()
+        self._pending = Database().get_preset_metadata_async(
+            partial(_write_snapshot, path, signature),
+            partial(self._replace, path))
+
+    def _replace(self, path: str, new_path: str) -> None:
+        # Mapped files can not be replaced on Windows
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+        try:
+            os.replace(new_path, path)
+        except OSError as error:
+            print(f"Saving preset snapshot failed: {error}")
+        self._snapshot = PresetSnapshot.open(path)
+        self.writes += 1
+
+    def _current_signature(self) -> Tuple[FileSignature, ...]:
+        if self._database_path is None:
+            self._database_path = resource_database_path()
+        return database_signature(self._database_path)
+
+
+preset_metadata = PresetMetadata()
+"""Preset metadata shared by every part of the plugin."""
@@ -1,20 +1,37 @@
 # SPDX-FileCopyrightText: © 2022-2023 Wojciech Trybus <wojtryb@gmail.com>
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-"""Wrappers and utilities based on Qt objects."""
+"""
+Wrappers and utilities based on Qt objects.
 
-from .custom_widgets import AnimatedWidget, BaseWidget
-from .safe_confirm_button import SafeConfirmButton
-from .pixmap_transform import PixmapTransform
-from .round_button import RoundButton
-from .colorizer import Colorizer
-from .painter import Painter
-from .timer import Timer
-from .text import Text
+Submodules are imported only when one of their names is first used.
+"""
+
+from ..lazy_import import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "SafeConfirmButton": "safe_confirm_button",
+    "PixmapTransform": "pixmap_transform",
+    "ThumbnailLoader": "thumbnail_loader",
+    "ObjectIndex": "object_index",
+    "find_objects": "hierarchy",
+    "find_object": "hierarchy",
+    "AnimatedWidget": "custom_widgets",
+    "RoundButton": "round_button",
+    "BaseWidget": "custom_widgets",
+    "Colorizer": "colorizer",
+    "Painter": "painter",
+    "Timer": "timer",
+    "Text": "text",
+})
 
 __all__ = [
     "SafeConfirmButton",
     "PixmapTransform",
+    "ThumbnailLoader",
+    "ObjectIndex",
+    "find_objects",
+    "find_object",
     "AnimatedWidget",
     "RoundButton",
     "BaseWidget",
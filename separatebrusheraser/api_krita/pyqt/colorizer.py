@@ -6,7 +6,7 @@ from enum import Enum
 
 from qtpy.QtGui import QColor
 
-from api_krita import Krita
+from .. import Krita
 from ..enums import BlendingMode
 
 
@@ -0,0 +1,63 @@
+from typing import Iterator, List, Optional, Tuple, Type
+
+from qtpy.QtCore import QObject, Qt
+
+
+def find_objects(
+    root: QObject,
+    object_type: Type[QObject] = QObject,
+    class_name: Optional[str] = None,
+    object_name: Optional[str] = None,
+    max_depth: Optional[int] = None,
+) -> Iterator[QObject]:
+    """
+    Lazily yield descendants of root matching all the given criteria.
+
+    - `object_type` is a wrapped Qt class the objects must inherit from
+    - `class_name` is the exact className of the objects, usable for
+      classes not wrapped by PyQt (like KoToolBoxButton)
+    - `max_depth` limits the search to that many levels below root
+
+    Without a depth limit, or with a limit of one level, the type and name
+    filtering is done by Qt's `findChildren`. Otherwise the tree is walked
+    depth first from an explicit stack, one level of children at a time,
+    so stopping the iteration early skips the rest of the tree.
+    """
+    if max_depth in (None, 1) \
+            and (object_name or object_type is not QObject):
+        options = Qt.FindChildrenRecursively if max_depth is None \
+            else Qt.FindDirectChildrenOnly
+        for obj in root.findChildren(object_type, object_name or "", options):
+            if class_name is None or \
+                    obj.metaObject().className() == class_name:
+                yield obj
+        return
+
+    stack: List[Tuple[QObject, int]] = [(root, 0)]
+    while stack:
+        obj, depth = stack.pop()
+        if obj is not root \
+                and isinstance(obj, object_type) \
+                and (object_name is None or obj.objectName() == object_name) \
+                and (class_name is None
+                     or obj.metaObject().className() == class_name):
+            yield obj
+        if max_depth is None or depth < max_depth:
+            stack.extend((child, depth+1)
+                         for child in reversed(obj.children()))
+
+
+def find_object(
+    root: QObject,
+    object_type: Type[QObject] = QObject,
+    class_name: Optional[str] = None,
+    object_name: Optional[str] = None,
+    max_depth: Optional[int] = None,
+) -> Optional[QObject]:
+    """Return the first descendant of root matching the criteria, or None."""
+    if max_depth in (None, 1) and class_name is None and object_name:
+        options = Qt.FindChildrenRecursively if max_depth is None \
+            else Qt.FindDirectChildrenOnly
+        return root.findChild(object_type, object_name, options)
+    return next(find_objects(
+        root, object_type, class_name, object_name, max_depth), None)
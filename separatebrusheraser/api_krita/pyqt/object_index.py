@@ -0,0 +1,66 @@
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type
+
+from qtpy.QtCore import QObject
+
+from .hierarchy import find_object
+
+IndexKey = Tuple[int, Hashable]
+
+
+class ObjectIndex:
+    """
+    Index of objects looked up under root objects, by query.
+
+    The first lookup of a query runs it (through Qt's `findChild` where
+    possible), later ones are a dictionary read. An entry is dropped when
+    its object or its root is destroyed, which the index learns from their
+    `destroyed` signals. Nothing is installed on the indexed objects, so
+    their events cost nothing more.
+
+    Objects created later are not noticed while the indexed one lives, so
+    the index suits widgets that exist once per root, like a toolbar of
+    the main window or a button in it.
+    """
+
+    def __init__(self) -> None:
+        self._objects: Dict[IndexKey, QObject] = {}
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def get(
+        self,
+        root: QObject,
+        query: Hashable,
+        lookup: Callable[[], Optional[QObject]],
+    ) -> Optional[QObject]:
+        """Return object indexed for `query` under root, or `lookup` one."""
+        key = (id(root), query)
+        obj = self._objects.get(key)
+        if obj is not None:
+            return obj
+        obj = lookup()
+        if obj is not None:
+            self._objects[key] = obj
+            forget = partial(self._forget, key)
+            obj.destroyed.connect(forget)
+            root.destroyed.connect(forget)
+        return obj
+
+    def find(
+        self,
+        root: QObject,
+        object_type: Type[QObject] = QObject,
+        class_name: Optional[str] = None,
+        object_name: Optional[str] = None,
+        max_depth: Optional[int] = None,
+    ) -> Optional[QObject]:
+        """Return first descendant of root matching the criteria, or None."""
+        return self.get(
+            root, (object_type, class_name, object_name, max_depth),
+            partial(find_object, root, object_type, class_name,
+                    object_name, max_depth))
+
+    def _forget(self, key: IndexKey, *_: Any) -> None:
+        self._objects.pop(key, None)
@@ -4,9 +4,9 @@
 import math
 from typing import Optional
 
-from qtpyi import QPainter, QPainterPath, QColor, QPixmap, QPaintEvent
-from qtpyre import QPoint, QRectF
-from qtpydgets import QWidget
+from qtpy.QtGui import QPainter, QPainterPath, QColor, QPixmap, QPaintEvent
+from qtpy.QtCore import QPoint, QRectF
+from qtpy.QtWidgets import QWidget
 
 
 class Painter:
@@ -16,8 +16,28 @@ class PixmapTransform:
     @staticmethod
     def make_pixmap_round(pixmap: QPixmap) -> QPixmap:
         """Make corners of the pixmap transparent, to make image a circle."""
-        image = pixmap.toImage()
-        image.convertToFormat(QImage.Format_ARGB32)
+        return QPixmap.fromImage(
+            PixmapTransform.make_image_round(pixmap.toImage()))
+
+    @staticmethod
+    def scale_pixmap(pixmap: QPixmap, size_px: int) -> QPixmap:
+        """Scale a square pixmal to new size."""
+        return pixmap.scaled(
+            size_px,
+            size_px,
+            Qt.KeepAspectRatio,
+            Qt.SmoothTransformation
+        )
+
+    @staticmethod
+    def make_image_round(image: QImage) -> QImage:
+        """
+        Make corners of the image transparent, to make it a circle.
+
+        Works on `QImage` only, so unlike the pixmap version it is safe
+        to use outside of the GUI thread.
+        """
+        image = image.convertToFormat(QImage.Format_ARGB32)
 
         imgsize = min(image.width(), image.height())
         out_img = QImage(imgsize, imgsize, QImage.Format_ARGB32)
@@ -30,12 +50,12 @@ class PixmapTransform:
         painter.drawEllipse(0, 0, imgsize, imgsize)
         painter.end()
 
-        return QPixmap.fromImage(out_img)
+        return out_img
 
     @staticmethod
-    def scale_pixmap(pixmap: QPixmap, size_px: int) -> QPixmap:
-        """Scale a square pixmal to new size."""
-        return pixmap.scaled(
+    def scale_image(image: QImage, size_px: int) -> QImage:
+        """Scale a square image to new size. Safe outside GUI thread."""
+        return image.scaled(
             size_px,
             size_px,
             Qt.KeepAspectRatio,
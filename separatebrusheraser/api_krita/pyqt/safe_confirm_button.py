@@ -1,7 +1,7 @@
 from typing import Optional
 
 from qtpy.QtGui import QIcon
-from qtpy.QtCore import pyqtSignal, QEvent
+from qtpy.QtCore import Signal, QEvent
 from qtpy.QtWidgets import QWidget, QPushButton
 
 
@@ -15,7 +15,7 @@ class SafeConfirmButton(QPushButton):
     Moving the mouse out of the button aborts the confirmation mode.
     """
 
-    clicked = pyqtSignal()  # type: ignore
+    clicked = Signal()  # type: ignore
     _empty_icon = QIcon()
 
     def __init__(
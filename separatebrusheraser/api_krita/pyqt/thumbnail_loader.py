@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from qtpy.QtCore import QObject, QRunnable, QThreadPool, Signal
+from qtpy.QtGui import QImage, QPixmap
+
+from .pixmap_transform import PixmapTransform
+
+ThumbnailKey = Tuple[str, int, bool]
+ThumbnailCallback = Callable[[QPixmap], None]
+
+
+class _ScaleTask(QRunnable):
+    """Scales (and rounds) one image on a thread pool thread."""
+
+    def __init__(self, key: ThumbnailKey, image: QImage,
+                 done: Signal) -> None:
+        super().__init__()
+        self._key = key
+        self._image = image
+        self._done = done
+
+    def run(self) -> None:
+        name, size_px, round_image = self._key
+        image = QImage()
+        try:
+            image = PixmapTransform.scale_image(self._image, size_px)
+            if round_image:
+                image = PixmapTransform.make_image_round(image)
+        except Exception as error:
+            print(f"Scaling thumbnail of {name} failed: {error}")
+            image = QImage()
+        finally:
+            # Always report back, so the request stops being in flight
+            self._done.emit(self._key, image)
+
+
+class ThumbnailLoader(QObject):
+    """
+    Loads thumbnails of named images, scaling them on a thread pool.
+
+    `image_of` returns the full image for a name (or None) and is called
+    on the GUI thread. Scaling and rounding run as `QImage` operations on
+    the global `QThreadPool`. Back on the GUI thread, results become
+    pixmaps kept in an LRU cache limited to `max_bytes` of pixel data.
+
+    Requests for a thumbnail which is already being scaled are merged:
+    all their callbacks get the one pixmap when it is ready. When scaling
+    fails they get a null pixmap, nothing is cached and the next request
+    tries again.
+    """
+
+    _scaled = Signal(object, object)
+
+    def __init__(self, image_of: Callable[[str], Optional[QImage]],
+                 max_bytes: int = 8 * 1024 * 1024) -> None:
+        super().__init__()
+        self._image_of = image_of
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[ThumbnailKey, QPixmap]" = OrderedDict()
+        self._cache_bytes = 0
+        self._in_flight: Dict[ThumbnailKey, List[ThumbnailCallback]] = {}
+        self._scaled.connect(self._on_scaled)
+
+    def get(self, name: str, size_px: int,
+            round_image: bool = False) -> Optional[QPixmap]:
+        """Return cached thumbnail or None if it is not loaded yet."""
+        key = (name, size_px, round_image)
+        pixmap = self._cache.get(key)
+        if pixmap is not None:
+            self._cache.move_to_end(key)
+        return pixmap
+
+    def request(
+        self,
+        name: str,
+        size_px: int,
+        round_image: bool = False,
+        callback: Optional[ThumbnailCallback] = None,
+    ) -> Optional[QPixmap]:
+        """
+        Return cached thumbnail, or start loading it and return None.
+
+        Callback is called with the pixmap once it is ready, right away
+        when it is already cached.
+        """
+        pixmap = self.get(name, size_px, round_image)
+        if pixmap is not None:
+            if callback is not None:
+                callback(pixmap)
+            return pixmap
+
+        key = (name, size_px, round_image)
+        callbacks = self._in_flight.get(key)
+        if callbacks is None:
+            image = self._image_of(name)
+            if image is None:
+                return None
+            callbacks = self._in_flight[key] = []
+            QThreadPool.globalInstance().start(
+                _ScaleTask(key, image, self._scaled))
+        if callback is not None:
+            callbacks.append(callback)
+        return None
+
+    def clear(self) -> None:
+        """Forget all cached thumbnails."""
+        self._cache.clear()
+        self._cache_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _on_scaled(self, key: ThumbnailKey, image: QImage) -> None:
+        callbacks = self._in_flight.pop(key, [])
+        pixmap = QPixmap.fromImage(image)
+        if not pixmap.isNull():
+            self._store(key, pixmap)
+        for callback in callbacks:
+            callback(pixmap)
+
+    def _store(self, key: ThumbnailKey, pixmap: QPixmap) -> None:
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._cache_bytes -= _pixmap_bytes(old)
+        self._cache[key] = pixmap
+        self._cache_bytes += _pixmap_bytes(pixmap)
+        while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= _pixmap_bytes(evicted)
+
+
+def _pixmap_bytes(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
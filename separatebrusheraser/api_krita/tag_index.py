@@ -0,0 +1,122 @@
+from concurrent.futures import Future
+from functools import partial
+from sys import intern
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from qtpy.QtCore import QTimer
+
+from .preset_snapshot import preset_metadata
+from .wrappers.database import (
+    Database,
+    FileSignature,
+    database_signature,
+    resource_database_path,
+)
+
+
+class TagIndex:
+    """
+    Process-wide two-way map between brush tags and preset names.
+
+    The whole mapping is read from the preset snapshot (or loaded with a
+    single query when the snapshot is stale) the first time it is needed,
+    so any lookup afterwards is a dictionary read. Names are interned and
+    stored in tuples to keep hundreds of tags cheap.
+
+    Once loaded, the database signature is checked every few seconds on
+    the event loop. When krita changed the database, the index is loaded
+    again on the database reader thread. Lookups keep using the previous
+    mapping until the new one arrives.
+    """
+
+    CHECK_INTERVAL_MS = 2000
+
+    def __init__(self) -> None:
+        self._tag_presets: Dict[str, Tuple[str, ...]] = {}
+        self._preset_tags: Dict[str, Tuple[str, ...]] = {}
+        self._tags: List[str] = []
+        self._signature: Optional[Tuple[FileSignature, ...]] = None
+        self._database_path: Optional[str] = None
+        self._timer: Optional[QTimer] = None
+        self._pending: Optional[Future] = None
+        self.builds = 0
+
+    def presets_of(self, tag_name: str) -> Tuple[str, ...]:
+        """Return names of presets that belong to given tag."""
+        self._ensure_loaded()
+        return self._tag_presets.get(tag_name, ())
+
+    def tags_of(self, preset_name: str) -> Tuple[str, ...]:
+        """Return names of tags given preset belongs to."""
+        self._ensure_loaded()
+        return self._preset_tags.get(preset_name, ())
+
+    def tags(self) -> List[str]:
+        """Return names of all tags with presets, sorted case-insensitively."""
+        self._ensure_loaded()
+        return list(self._tags)
+
+    def refresh(self) -> None:
+        """Load the mapping from the database again."""
+        signature = self._current_signature()
+        snapshot = preset_metadata.current()
+        if snapshot is not None:
+            pairs: Iterable[Tuple[str, str]] = snapshot.tag_pairs()
+        else:
+            pairs = Database().get_brush_tag_presets()
+        self._replace(signature, _build_maps(pairs))
+
+    def refresh_async(self) -> None:
+        """Load the mapping again on the database reader thread."""
+        if self._pending is not None and not self._pending.done():
+            return
+        signature = self._current_signature()
+        self._pending = Database().get_brush_tag_presets_async(
+            _build_maps, partial(self._replace, signature))
+
+    def _replace(self, signature: Tuple[FileSignature, ...],
+                 maps: '_Maps') -> None:
+        self._tag_presets, self._preset_tags, self._tags = maps
+        self._signature = signature
+        self.builds += 1
+
+    def _current_signature(self) -> Tuple[FileSignature, ...]:
+        if self._database_path is None:
+            self._database_path = resource_database_path()
+        return database_signature(self._database_path)
+
+    def _ensure_loaded(self) -> None:
+        if self._signature is not None:
+            return
+        self.refresh()
+        if self._timer is None:
+            self._timer = QTimer()
+            self._timer.setInterval(self.CHECK_INTERVAL_MS)
+            self._timer.timeout.connect(self._refresh_if_changed)
+            self._timer.start()
+
+    def _refresh_if_changed(self) -> None:
+        if self._current_signature() != self._signature:
+            self.refresh_async()
+
+
+_Maps = Tuple[Dict[str, Tuple[str, ...]], Dict[str, Tuple[str, ...]],
+              List[str]]
+
+
+def _build_maps(pairs: Iterable[Tuple[str, str]]) -> _Maps:
+    """Return tag to presets map, preset to tags map and sorted tags."""
+    tag_presets: Dict[str, List[str]] = {}
+    preset_tags: Dict[str, List[str]] = {}
+    for tag, preset in pairs:
+        tag, preset = intern(tag), intern(preset)
+        tag_presets.setdefault(tag, []).append(preset)
+        preset_tags.setdefault(preset, []).append(tag)
+    return (
+        {tag: tuple(presets) for tag, presets in tag_presets.items()},
+        {preset: tuple(tags) for preset, tags in preset_tags.items()},
+        sorted(tag_presets, key=str.lower))
+
+
+tag_index = TagIndex()
+"""Tag map shared by every part of the plugin."""
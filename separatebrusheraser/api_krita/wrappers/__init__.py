@@ -5,15 +5,20 @@
 Wrappers of classes in krita API.
 
 Adds typing, dosctrings and changes the interface to be PEP8 compatibile.
+Submodules are imported only when one of their names is first used.
 """
 
-from .tool_descriptor import ToolDescriptor
-from .database import Database
-from .document import Document
-from .canvas import Canvas
-from .cursor import Cursor
-from .node import Node
-from .view import View
+from ..lazy_import import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "ToolDescriptor": "tool_descriptor",
+    "Database": "database",
+    "Document": "document",
+    "Canvas": "canvas",
+    "Cursor": "cursor",
+    "Node": "node",
+    "View": "view",
+})
 
 __all__ = [
     "ToolDescriptor",
@@ -2,17 +2,120 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from krita import Krita as Api
-import os.path
-from typing import List, Any
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from concurrent.futures import Future
 
 from qtpy.QtSql import QSqlDatabase, QSqlQuery
 
+from .database_reader import DatabaseReader, Rows
+
+
+def resource_database_path() -> str:
+    """Return path of the sqlite database in which krita caches resources."""
+    path = Api.instance().readSetting("", "ResourceDirectory", "")
+    return os.path.join(path, "resourcecache.sqlite")
+
+
+FileSignature = Optional[Tuple[int, int]]
+
+
+def database_signature(path: str) -> Tuple[FileSignature, ...]:
+    """
+    Return mtime and size of the database and its write-ahead log.
+
+    Krita writes to the database whenever a resource or a tag is added,
+    removed or modified, so any change to it changes the signature.
+    """
+    return tuple(_file_signature(path + suffix) for suffix in ("", "-wal"))
+
+
+def _file_signature(path: str) -> FileSignature:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
 
 class Database:
-    """Explorer of the database with krita resources."""
+    """
+    Explorer of the database with krita resources.
+
+    The connection stays open and every query is prepared once, then
+    reused with bound parameters. Results are cached per query and
+    parameters until the database file changes on disk.
+
+    Methods with the `_async` suffix run their query on the worker thread
+    of a `DatabaseReader` instead and return a future. Their callback is
+    called on the GUI thread, right away when the result is cached.
+    """
 
     connection_name = "ShortcutComposer"
 
+    _reader: Optional[DatabaseReader] = None
+    _queries: Dict[str, QSqlQuery] = {}
+    _cache: Dict[Tuple[Any, ...], List[Any]] = {}
+    _cache_signature: Tuple[FileSignature, ...] = ()
+
+    PRESETS_FROM_TAG_QUERY = '''
+        SELECT DISTINCT r.name AS preset
+        FROM tags t
+            JOIN resource_tags rt
+                ON t.id=rt.tag_id
+            JOIN resources r
+                ON r.id = rt.resource_id
+        WHERE
+            t.name=?
+            AND rt.active = 1
+    '''
+
+    BRUSH_TAGS_QUERY = '''
+        SELECT DISTINCT t.name AS tag
+        FROM tags t
+        WHERE
+            t.active = 1
+            AND t.resource_type_id = 5
+    '''
+
+    BRUSH_TAG_PRESETS_QUERY = '''
+        SELECT DISTINCT t.name AS tag, r.name AS preset
+        FROM tags t
+            JOIN resource_tags rt
+                ON t.id=rt.tag_id
+            JOIN resources r
+                ON r.id = rt.resource_id
+        WHERE
+            t.active = 1
+            AND t.resource_type_id = 5
+            AND rt.active = 1
+    '''
+
+    PRESET_METADATA_QUERY = '''
+        SELECT
+            r.id,
+            r.name,
+            (SELECT vr.md5sum FROM versioned_resources vr
+                WHERE vr.resource_id = r.id
+                ORDER BY vr.version DESC LIMIT 1) AS md5,
+            s.location AS storage,
+            group_concat(t.name, char(31)) AS tags
+        FROM resources r
+            JOIN storages s
+                ON s.id = r.storage_id
+            LEFT JOIN resource_tags rt
+                ON rt.resource_id = r.id AND rt.active = 1
+            LEFT JOIN tags t
+                ON t.id = rt.tag_id AND t.active = 1
+        WHERE
+            r.resource_type_id = 5
+            AND r.status = 1
+            AND s.active = 1
+        GROUP BY r.id
+        ORDER BY r.id
+    '''
+
     def __init__(self) -> None:
         self.connect_if_needed()
 
@@ -23,56 +126,212 @@ class Database:
             return
 
         cls.database = QSqlDatabase.addDatabase("QSQLITE", cls.connection_name)
-        path = Api.instance().readSetting("", "ResourceDirectory", "")
-        path = os.path.join(path, "resourcecache.sqlite")
-        cls.database.setDatabaseName(path)
+        cls.database_path = resource_database_path()
+        cls.database.setDatabaseName(cls.database_path)
+        cls.database.setConnectOptions("QSQLITE_OPEN_READONLY")
+
+    @classmethod
+    def reader(cls) -> DatabaseReader:
+        """Return reader shared by all instances, creating it if needed."""
+        if Database._reader is None:
+            Database._reader = DatabaseReader()
+        return Database._reader
 
-    def _single_column_query(self, sql_query: str, value: str) -> List[Any]:
+    def _single_column_query(
+        self,
+        sql_query: str,
+        value: str,
+        *parameters: Any,
+    ) -> List[Any]:
         """Use SQL query to get single column in a form of a list."""
-        if not self.database.open():
-            return []
+        return list(self._cached(
+            (sql_query, value, parameters),
+            lambda: self._column(sql_query, value, parameters)))
+
+    def _column(
+        self,
+        sql_query: str,
+        value: str,
+        parameters: Tuple[Any, ...],
+    ) -> Optional[List[Any]]:
+        """Run query returning one column, None if it failed."""
+        rows = self._run_query(sql_query, (value,), parameters)
+        return None if rows is None else [row[0] for row in rows]
+
+    def _run_query(
+        self,
+        sql_query: str,
+        values: Tuple[str, ...],
+        parameters: Tuple[Any, ...],
+    ) -> Optional[List[Tuple[Any, ...]]]:
+        """
+        Run prepared query with given positional parameters.
 
-        query_handler = QSqlQuery(self.database)
-        if not query_handler.exec(sql_query):
-            return []
+        Returns None when the database could not be opened or the query
+        failed, so callers can tell it from an empty result.
+        """
+        query_handler = self._prepared(sql_query)
+        if query_handler is None:
+            return None
+
+        for position, parameter in enumerate(parameters):
+            query_handler.bindValue(position, parameter)
+        if not query_handler.exec():
+            return None
 
         return_list = []
         while query_handler.next():
-            return_list.append(query_handler.value(value))
+            return_list.append(
+                tuple(query_handler.value(value) for value in values))
 
         query_handler.finish()
         return return_list
 
+    def _prepared(self, sql_query: str) -> Optional[QSqlQuery]:
+        """Return query prepared on the open connection."""
+        if not self.database.isOpen() and not self.database.open():
+            return None
+
+        query_handler = self._queries.get(sql_query)
+        if query_handler is None:
+            query_handler = QSqlQuery(self.database)
+            if not query_handler.prepare(sql_query):
+                return None
+            self._queries[sql_query] = query_handler
+        return query_handler
+
+    def _cached(
+        self,
+        key: Tuple[Any, ...],
+        compute: Callable[[], Optional[List[Any]]],
+    ) -> List[Any]:
+        """
+        Return cached result, computing it if the database changed.
+
+        `compute` returns None when the query failed. Nothing is cached
+        then, so a transient error (locked database) is retried on the
+        next call, and an empty list is returned.
+        """
+        self._validate_cache()
+        result = self._cache.get(key)
+        if result is None:
+            result = compute()
+            if result is None:
+                return []
+            self._cache[key] = result
+        return result
+
+    def _cached_async(
+        self,
+        key: Tuple[Any, ...],
+        sql_query: str,
+        parameters: Tuple[Any, ...],
+        transform: Callable[[Rows], List[Any]],
+        callback: Optional[Callable[[List[Any]], None]],
+    ) -> Future:
+        """Return future of cached result, or read it on the worker."""
+        self._validate_cache()
+        result = self._cache.get(key)
+        if result is not None:
+            future: Future = Future()
+            future.set_result(list(result))
+            if callback is not None:
+                callback(list(result))
+            return future
+
+        signature = Database._cache_signature
+
+        def store(result: List[Any]) -> None:
+            if Database._cache_signature == signature:
+                self._cache[key] = result
+            if callback is not None:
+                callback(list(result))
+
+        return self.reader().query(
+            self.database_path, sql_query, parameters, transform, store)
+
+    def _validate_cache(self) -> None:
+        """Drop cached results if the database changed on disk."""
+        signature = database_signature(self.database_path)
+        if signature != Database._cache_signature:
+            Database._cache_signature = signature
+            self._cache.clear()
+
     def get_preset_names_from_tag(self, tag_name: str) -> List[str]:
         """Return list of all preset names that belong to given tag."""
-        tag_name = tag_name.replace("\"", "\"\"")
-        sql_query = f'''
-            SELECT DISTINCT r.name AS preset
-            FROM tags t
-                JOIN resource_tags rt
-                    ON t.id=rt.tag_id
-                JOIN resources r
-                    ON r.id = rt.resource_id
-            WHERE
-                t.name="{tag_name}"
-                AND rt.active = 1
-        '''
-        return self._single_column_query(sql_query, "preset")
+        return self._single_column_query(
+            self.PRESETS_FROM_TAG_QUERY, "preset", tag_name)
+
+    def get_preset_names_from_tag_async(
+        self,
+        tag_name: str,
+        callback: Optional[Callable[[List[str]], None]] = None,
+    ) -> Future:
+        """Read list of all preset names that belong to given tag."""
+        return self._cached_async(
+            (self.PRESETS_FROM_TAG_QUERY, "preset", (tag_name,)),
+            self.PRESETS_FROM_TAG_QUERY, (tag_name,),
+            _first_column, callback)
 
     def get_brush_tags(self) -> List[str]:
         "Return list of all tag names."
-        sql_query = '''
-            SELECT DISTINCT t.name AS tag
-            FROM tags t
-            WHERE
-                t.active = 1
-                AND t.resource_type_id = 5
-        '''
-        presets = self._single_column_query(sql_query, "tag")
-        return sorted(presets, key=str.lower)
+        return list(self._cached(
+            (self.BRUSH_TAGS_QUERY, "sorted"),
+            lambda: _sorted_tags(
+                self._column(self.BRUSH_TAGS_QUERY, "tag", ()))))
+
+    def get_brush_tags_async(
+        self,
+        callback: Optional[Callable[[List[str]], None]] = None,
+    ) -> Future:
+        "Read list of all tag names."
+        return self._cached_async(
+            (self.BRUSH_TAGS_QUERY, "sorted"),
+            self.BRUSH_TAGS_QUERY, (),
+            lambda rows: sorted(_first_column(rows), key=str.lower),
+            callback)
+
+    def get_brush_tag_presets(self) -> List[Tuple[str, str]]:
+        """
+        Return (tag, preset) name pairs of all active brush tags.
+
+        Not cached, as it is meant to be kept by the caller (`TagIndex`).
+        """
+        return self._run_query(
+            self.BRUSH_TAG_PRESETS_QUERY, ("tag", "preset"), ()) or []
+
+    def get_brush_tag_presets_async(
+        self,
+        transform: Callable[[Rows], Any] = list,
+        callback: Optional[Callable[[Any], None]] = None,
+    ) -> Future:
+        """
+        Read (tag, preset) name pairs of all active brush tags.
+
+        `transform` is applied to the pairs on the worker thread.
+        """
+        return self.reader().query(
+            self.database_path, self.BRUSH_TAG_PRESETS_QUERY, (),
+            transform, callback)
+
+    def get_preset_metadata_async(
+        self,
+        transform: Callable[[Rows], Any] = list,
+        callback: Optional[Callable[[Any], None]] = None,
+    ) -> Future:
+        """
+        Read id, name, md5, storage and joined tags of all active presets.
+
+        Tag names of a preset are joined with the unit separator (0x1f).
+        `transform` is applied to the rows on the worker thread.
+        """
+        return self.reader().query(
+            self.database_path, self.PRESET_METADATA_QUERY, (),
+            transform, callback)
 
     def close(self) -> None:
-        """Close the connection with the database."""
+        """Close the connection with the database and drop its queries."""
+        self._queries.clear()
         self.database.close()
 
     def __enter__(self) -> 'Database':
@@ -80,5 +339,12 @@ class Database:
         return self
 
     def __exit__(self, *_) -> None:
-        """Close the connection with the database on exit."""
-        self.close()
+        """Keep the connection open, so the next use does not reopen it."""
+
+
+def _first_column(rows: Rows) -> List[Any]:
+    return [row[0] for row in rows]
+
+
+def _sorted_tags(tags: Optional[List[str]]) -> Optional[List[str]]:
+    return None if tags is None else sorted(tags, key=str.lower)
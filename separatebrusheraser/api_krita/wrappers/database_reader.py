@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+from qtpy.QtCore import QObject, Signal
+
+Rows = List[Tuple[Any, ...]]
+
+
+class _Delivery(QObject):
+    """Hands finished futures from the worker to the thread it lives in."""
+
+    finished = Signal(object, object)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.finished.connect(self._deliver)
+
+    @staticmethod
+    def _deliver(callback: Callable[[Any], None], future: Future) -> None:
+        try:
+            result = future.result()
+        except Exception as error:
+            print(f"Reading resource database failed: {error}")
+            return
+        callback(result)
+
+
+class DatabaseReader:
+    """
+    Reads the resource database on a worker thread.
+
+    The worker has its own read-only stdlib `sqlite3` connection, so
+    krita's GUI thread never waits for a query. Every query returns a
+    `Future`. When a callback is given, it is called with the result on
+    the thread which created the reader (the GUI thread), through a
+    queued signal.
+
+    `transform` runs on the worker too, so converting or sorting big
+    results does not stall the GUI either.
+    """
+
+    def __init__(self) -> None:
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._delivery = _Delivery()
+
+    def query(
+        self,
+        path: str,
+        sql_query: str,
+        parameters: Tuple[Any, ...] = (),
+        transform: Callable[[Rows], Any] = list,
+        callback: Optional[Callable[[Any], None]] = None,
+    ) -> Future:
+        """Run query on database at `path` and return future of result."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="ResourceDatabaseReader")
+        future = self._executor.submit(
+            self._run, path, sql_query, parameters, transform)
+        if callback is not None:
+            future.add_done_callback(
+                lambda done: self._delivery.finished.emit(callback, done))
+        return future
+
+    def shutdown(self) -> None:
+        """Stop the worker after queries already submitted."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _run(
+        self,
+        path: str,
+        sql_query: str,
+        parameters: Tuple[Any, ...],
+        transform: Callable[[Rows], Any],
+    ) -> Any:
+        return transform(
+            self._connection(path).execute(sql_query, parameters).fetchall())
+
+    def _connection(self, path: str) -> sqlite3.Connection:
+        """Return read-only connection of the worker thread."""
+        if getattr(self._local, "path", None) != path:
+            connection = getattr(self._local, "connection", None)
+            if connection is not None:
+                connection.close()
+            self._local.connection = sqlite3.connect(
+                _read_only_uri(path), uri=True)
+            self._local.path = path
+        return self._local.connection
+
+
+def _read_only_uri(path: str) -> str:
+    """
+    Return sqlite URI opening database at `path` read-only.
+
+    `immutable=1` is not used: krita keeps writing to the database while
+    it runs, and an immutable connection would neither lock nor notice
+    the changes. Read-only mode still sees what krita commits through the
+    write-ahead log. `as_uri` keeps Windows drive letters intact.
+    """
+    return Path(os.path.abspath(path)).as_uri() + "?mode=ro"
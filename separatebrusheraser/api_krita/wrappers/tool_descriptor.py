@@ -1,16 +1,21 @@
 # SPDX-FileCopyrightText: © 2022-2023 Wojciech Trybus <wojtryb@gmail.com>
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from functools import partial
+from typing import Dict, Optional
+
 from krita import Krita as Api
 from qtpy.QtWidgets import QWidget, QToolButton
 
 from ..enums import Tool
 
+TOOLS_BY_NAME: Dict[str, Tool] = {tool.value: tool for tool in Tool}
+
 
 class ToolDescriptor:
     """Allows setting active `Tool`, as if it was a instance variable."""
 
-    _tool_finder: 'ToolFinder'
+    _tool_tracker: Optional['ToolTracker'] = None
 
     def __init__(self) -> None:
         self.instance = Api.instance()
@@ -23,42 +28,69 @@ class ToolDescriptor:
         """
         Return enum of an active tool.
 
-        First call creates a new ToolFinder needed to fetch a tool.
-        It is then stored as attribute, as it's creation in relatively
-        heavy.
+        First call creates a new ToolTracker which follows the toolbox
+        buttons from then on. It cannot be created in __init__, as krita
+        is not fully initialized at this point.
+
+        Further calls return the tool remembered by the tracker.
+        """
+        tracker = self._tool_tracker
+        if tracker is None:
+            tracker = self._tool_tracker = self.ToolTracker()
+        tool = tracker.active_tool
+        if tool is None:
+            return tracker.resolve()
+        return tool
 
-        Further calls will reuse the same ToolFinder instance.
-        ToolFinder cannot be created in __init__, as krita is not fully
-        initialized at this point.
+    class ToolTracker:
         """
-        if not hasattr(self, "_tool_finder"):
-            self._tool_finder = self.ToolFinder()
-        current_tool_name = self._tool_finder.find_active_tool_name()
-        return Tool(current_tool_name)
+        Helper class keeping track of currently active tool.
 
-    class ToolFinder:
-        """Helper class for finding currently active tool."""
+        Listens to `toggled` of every toolbox button, so the active tool
+        is known without looking at the buttons. When the toolbox gets
+        deleted, the next read looks for the new one and binds to it.
+        """
 
         def __init__(self) -> None:
-            """Remember the reference to toolbox krita object."""
             self.instance = Api.instance()
-            self.toolbox: QWidget
+            self.active_tool: Optional[Tool] = None
+            self._active_name: Optional[str] = None
+            self._toolbox_alive = False
+
+        def resolve(self) -> Tool:
+            """Return active tool when it is not known as a `Tool` yet."""
+            if not self._toolbox_alive:
+                self._bind_toolbox()
+            if self._active_name is None:
+                raise RuntimeError("No active tool found.")
+            self.active_tool = Tool(self._active_name)
+            return self.active_tool
 
-        def find_active_tool_name(self) -> str:
-            """Find and return name of currently active tool."""
-            self._ensure_toolbox()
-            for qobj in self.toolbox.findChildren(QToolButton):
+        def _bind_toolbox(self) -> None:
+            """Find the toolbox, remember its active tool and follow it."""
+            toolbox = self._init_toolbox()
+            toolbox.destroyed.connect(self._on_toolbox_destroyed)
+            self._toolbox_alive = True
+            self._active_name = None
+            for qobj in toolbox.findChildren(QToolButton):
                 if qobj.metaObject().className() == "KoToolBoxButton":
+                    name = qobj.objectName()
+                    qobj.toggled.connect(partial(self._on_toggled, name))
                     if qobj.isChecked():
-                        return qobj.objectName()
-            raise RuntimeError("No active tool found.")
-
-        def _ensure_toolbox(self):
-            """Fetch toolbox if it was not fetched or got deleted."""
-            try:
-                self.toolbox.size()
-            except (RuntimeError, AttributeError):
-                self.toolbox = self._init_toolbox()
+                        self._active_name = name
+
+        def _on_toggled(self, name: str, checked: bool) -> None:
+            if checked:
+                self._active_name = name
+                self.active_tool = TOOLS_BY_NAME.get(name)
+            elif name == self._active_name:
+                self._active_name = None
+                self.active_tool = None
+
+        def _on_toolbox_destroyed(self, *_) -> None:
+            self._toolbox_alive = False
+            self._active_name = None
+            self.active_tool = None
 
         def _init_toolbox(self) -> QWidget:
             """Find and return reference to unwrapped toolbox object."""
@@ -1,12 +1,11 @@
 # SPDX-FileCopyrightText: © 2022-2023 Wojciech Trybus <wojtryb@gmail.com>
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from krita import Krita as Api
 from dataclasses import dataclass
 from typing import Protocol, Dict
-from functools import cached_property
 
 from ..enums import BlendingMode
+from ..preset_index import preset_index
 
 
 class _KritaPreset(Protocol):
@@ -36,10 +35,10 @@ class View:
 
     view: KritaView
 
-    @cached_property
+    @property
     def preset_map(self) -> Dict[str, _KritaPreset]:
         """Return dictionary mapping preset names to krita preset objects."""
-        return Api.instance().resources('preset')
+        return preset_index.presets()
 
     @property
     def brush_preset(self) -> str:
@@ -72,6 +71,16 @@ class View:
         """Set painting opacity inside this `View`."""
         self.view.setPaintingOpacity(0.01*round(opacity))
 
+    @property
+    def painting_opacity(self) -> float:
+        """Settable property with painting opacity as fraction (0-1)."""
+        return self.view.paintingOpacity()
+
+    @painting_opacity.setter
+    def painting_opacity(self, opacity: float) -> None:
+        """Set painting opacity inside this `View` without rounding."""
+        self.view.setPaintingOpacity(opacity)
+
     @property
     def flow(self) -> int:
         """Settable property with painting flow as %."""
@@ -82,6 +91,16 @@ class View:
         """Set painting flow inside this `View`."""
         self.view.setPaintingFlow(0.01*round(flow))
 
+    @property
+    def painting_flow(self) -> float:
+        """Settable property with painting flow as fraction (0-1)."""
+        return self.view.paintingFlow()
+
+    @painting_flow.setter
+    def painting_flow(self, flow: float) -> None:
+        """Set painting flow inside this `View` without rounding."""
+        self.view.setPaintingFlow(flow)
+
     @property
     def brush_size(self) -> float:
         """Settable property with brush size in pixels."""
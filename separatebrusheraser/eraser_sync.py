@@ -0,0 +1,138 @@
+from time import perf_counter
+from typing import Callable
+
+from .qtpy.qtpy.QtCore import QTimer
+
+
+class ReconcileScheduler:
+    """Adaptive polling fallback for eraser state reconciliation.
+
+    Polls at `min_interval_ms` right after it is poked (brush/eraser
+    action, tool change, view change) and backs off step by step to
+    `max_interval_ms` while nothing happens. Polling pauses while
+    `is_active` returns False and resumes on the next poke.
+
+    Every reconciliation is timed. When the time spent in one second goes
+    over `cpu_budget_ms`, the fastest allowed interval is doubled until the
+    plugin fits the budget again, and relaxed back one step after each
+    second that stayed within it.
+    """
+
+    BACKOFF_FACTOR = 2.0
+
+    def __init__(self, reconcile: Callable[[], None],
+                 is_active: Callable[[], bool], min_interval_ms: int,
+                 max_interval_ms: int, cpu_budget_ms: float):
+        self._reconcile = reconcile
+        self._is_active = is_active
+        self.min_interval_ms = max(1, min_interval_ms)
+        self.max_interval_ms = max(self.min_interval_ms, max_interval_ms)
+        self.cpu_budget_ms = cpu_budget_ms
+        # Fastest interval the watchdog currently allows
+        self._floor_ms = float(self.min_interval_ms)
+        self._interval_ms = float(self.min_interval_ms)
+        self._window_start = perf_counter()
+        self._window_cost = 0.0
+        # Without a parent, so it does not go away with the window that
+        # was active when polling started
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._tick)
+
+    @property
+    def interval_ms(self) -> int:
+        return int(self._interval_ms)
+
+    @property
+    def paused(self) -> bool:
+        return not self._timer.isActive()
+
+    def start(self):
+        self.poke()
+
+    def stop(self):
+        self._timer.stop()
+
+    def poke(self):
+        """Something changed: go back to the fastest allowed rate."""
+        self._interval_ms = self._floor_ms
+        self._timer.start(self.interval_ms)
+
+    def run(self):
+        """Reconcile now, counting the time spent against the budget."""
+        start = perf_counter()
+        self._reconcile()
+        self._account(perf_counter() - start)
+
+    def _tick(self):
+        if not self._is_active():
+            # Stay paused until the next poke (view created / activated)
+            return
+        self.run()
+        self._interval_ms = min(
+            float(self.max_interval_ms),
+            max(self._floor_ms, self._interval_ms * self.BACKOFF_FACTOR))
+        self._timer.start(self.interval_ms)
+
+    def _account(self, cost_s: float):
+        now = perf_counter()
+        if now - self._window_start >= 1.0:
+            prev_cost, self._window_cost = self._window_cost, 0.0
+            self._window_start = now
+            if self._floor_ms > self.min_interval_ms \
+                    and prev_cost * 1000 <= self.cpu_budget_ms:
+                # Last window stayed within the budget, relax the throttle
+                self._floor_ms = max(float(self.min_interval_ms),
+                                     self._floor_ms / self.BACKOFF_FACTOR)
+        self._window_cost += cost_s
+        if self._window_cost * 1000 > self.cpu_budget_ms:
+            self._floor_ms = min(float(self.max_interval_ms),
+                                 self._floor_ms * self.BACKOFF_FACTOR)
+            self._interval_ms = max(self._interval_ms, self._floor_ms)
+
+
+class EraserStateSync:
+    """Runs eraser state reconciliation only when Krita reports a change.
+
+    Every bound signal only requests a reconciliation. Requests are
+    coalesced into a single deferred call, so a burst of signals (tool
+    switch toggling a dozen buttons, preset change toggling erase_action)
+    results in one reconciliation once Krita has settled.
+    """
+
+    def __init__(self, reconcile: Callable[[], None]):
+        self._reconcile = reconcile
+        self._pending = False
+        self.scheduler: ReconcileScheduler | None = None
+
+    def request(self, *_):
+        """Schedule a reconciliation unless one is already pending."""
+        if self.scheduler:
+            self.scheduler.poke()
+        if self._pending:
+            return
+        self._pending = True
+        QTimer.singleShot(0, self._run)
+
+    def _run(self):
+        self._pending = False
+        if self.scheduler:
+            self.scheduler.run()
+        else:
+            self._reconcile()
+
+    def bind_signal(self, signal):
+        signal.connect(self.request)
+
+    def bind_notifier(self, notifier):
+        """Reconcile whenever views or windows come and go."""
+        for signal in (notifier.viewCreated, notifier.viewClosed,
+                       notifier.windowCreated):
+            self.bind_signal(signal)
+
+    def start_fallback_polling(self, scheduler: ReconcileScheduler):
+        """Poll adaptively as well, for state changes no signal reports."""
+        if self.scheduler:
+            return
+        self.scheduler = scheduler
+        scheduler.start()
@@ -11,10 +11,25 @@ ComplexAction (public) that supports:
 - distinguishing between short and long key presses
 
 It has no external dependencies, so that it can be copy-pasted to any
-other krita plugin.
+other krita plugin. Submodules are imported only when one of their
+names is first used.
 """
 
-from .action_manager import ActionManager
-from .complex_action_interface import ComplexActionInterface
+from importlib import import_module
+from typing import Any
+
+_EXPORTS = {
+    "ActionManager": "action_manager",
+    "ComplexActionInterface": "complex_action_interface",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = ['ActionManager', 'ComplexActionInterface']
@@ -7,6 +7,7 @@ key_release events.
 """
 
 from dataclasses import dataclass
+from functools import partial
 from typing import Dict
 
 from qtpy.QtWidgets import QWidgetAction
@@ -77,16 +78,27 @@ class ActionManager:
             shortcut=self._create_adapter(action)
         )
         self._stored_actions[action.name] = container
+        self._index_shortcut(container)
+        container.krita_action.changed.connect(
+            partial(self._index_shortcut, container))
+
+    def refresh_shortcuts(self) -> None:
+        """Read shortcuts of all stored actions again."""
+        for container in self._stored_actions.values():
+            self._index_shortcut(container)
+
+    def _index_shortcut(self, container: ActionContainer) -> None:
+        """Make the event filter react to release of the shortcut keys."""
+        self._event_filter.set_release_keys(
+            container.shortcut.event_filter_callback,  # type: ignore
+            container.shortcut.shortcut_keys())
 
     def _create_adapter(self, action: ComplexActionInterface) \
             -> ShortcutAdapter:
         """
         Create ShortcutAdapter which runs elements of ComplexAction interface.
 
-        Adapter require registering its callback in event filter.
+        Adapter callback gets registered in event filter for the keys of
+        its shortcut, once the krita action exists.
         """
-        shortcut_adapter = ShortcutAdapter(action)
-        self._event_filter.register_release_callback(
-            shortcut_adapter.event_filter_callback  # type: ignore
-        )
-        return shortcut_adapter
+        return ShortcutAdapter(action)
@@ -1,38 +1,130 @@
 # SPDX-FileCopyrightText: © 2022-2023 Wojciech Trybus <wojtryb@gmail.com>
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from typing import Callable, List, Literal
+from typing import Callable, Dict, List, Literal, Optional, Set, Tuple
 
-from qtpy.QtCore import QEvent
-from qtpy.QtWidgets import QMdiArea
+from qtpy.QtCore import QEvent, QObject
 
 EventCallback = Callable[[QEvent], None]
+KeyHandlers = Dict[Optional[int], List[EventCallback]]
 
 
-class ReleaseKeyEventFilter(QMdiArea):
-    """Event filter for running registered callbacks on KeyRelease."""
+class KeyEventDispatcher(QObject):
+    """
+    Event filter running callbacks registered for specific key events.
+
+    Callbacks are registered for an event type and optionally for a key
+    and exact keyboard modifiers. None stands for any key or any
+    modifiers. Each event is first rejected by type, then found in a
+    table keyed by event type and key, so the cost of an event does not
+    depend on how many callbacks are registered for other keys.
+
+    The same dispatcher can be installed on any number of objects.
+    """
 
     def __init__(self) -> None:
-        """Create list to hold callbacks as they get registered."""
+        """Create tables to hold callbacks as they get registered."""
         super().__init__(None)
-        self._release_callbacks: List[EventCallback] = []
+        self._any_key: Dict[QEvent.Type, List[EventCallback]] = {}
+        self._by_key: Dict[Tuple[QEvent.Type, int], KeyHandlers] = {}
+        self._event_types: Set[QEvent.Type] = set()
 
-    def register_release_callback(self, callback: EventCallback) -> None:
-        """Register callback, so it can get executed on each KeyRelease."""
-        self._release_callbacks.append(callback)
+    def register(
+        self,
+        event_type: QEvent.Type,
+        callback: EventCallback,
+        key: Optional[int] = None,
+        modifiers: Optional[int] = None,
+    ) -> None:
+        """Run callback on events of given type, key and modifiers."""
+        self._callbacks(event_type, key, modifiers).append(callback)
+        self._event_types.add(event_type)
+
+    def unregister(
+        self,
+        event_type: QEvent.Type,
+        callback: EventCallback,
+        key: Optional[int] = None,
+        modifiers: Optional[int] = None,
+    ) -> None:
+        """Stop running callback registered with the same arguments."""
+        callbacks = self._callbacks(event_type, key, modifiers)
+        if callback in callbacks:
+            callbacks.remove(callback)
+        self._drop_empty()
 
     def eventFilter(self, _, event: QEvent) -> Literal[False]:
         """
         Override filtering method, executed by Qt on every event.
 
-        When the event is recognised to be KeyRelease event, run all
-        registered callbacks.
+        Run callbacks registered for the event, if it is of the type any
+        callback waits for.
 
         Always return False to let the event reach its desired
         destination.
         """
-        if event.type() == QEvent.KeyRelease:
-            for callback in self._release_callbacks:
+        event_type = event.type()
+        if event_type not in self._event_types:
+            return False
+        for callback in self._any_key.get(event_type, ()):
+            callback(event)
+        key_handlers = self._by_key.get((event_type, event.key()))
+        if key_handlers:
+            for callback in key_handlers.get(None, ()):
+                callback(event)
+            for callback in key_handlers.get(int(event.modifiers()), ()):
                 callback(event)
-
         return False
+
+    def _callbacks(
+        self,
+        event_type: QEvent.Type,
+        key: Optional[int],
+        modifiers: Optional[int],
+    ) -> List[EventCallback]:
+        """Return list of callbacks for given arguments, creating it."""
+        if key is None:
+            return self._any_key.setdefault(event_type, [])
+        key_handlers = self._by_key.setdefault((event_type, key), {})
+        if modifiers is not None:
+            modifiers = int(modifiers)
+        return key_handlers.setdefault(modifiers, [])
+
+    def _drop_empty(self) -> None:
+        """Forget empty callback lists and event types nobody waits for."""
+        self._any_key = {
+            event_type: callbacks
+            for event_type, callbacks in self._any_key.items() if callbacks}
+        for key_handlers in self._by_key.values():
+            for modifiers in [m for m, c in key_handlers.items() if not c]:
+                del key_handlers[modifiers]
+        self._by_key = {
+            handler_key: key_handlers
+            for handler_key, key_handlers in self._by_key.items()
+            if key_handlers}
+        self._event_types = set(self._any_key).union(
+            event_type for event_type, _ in self._by_key)
+
+
+class ReleaseKeyEventFilter(KeyEventDispatcher):
+    """Event filter for running registered callbacks on KeyRelease."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._release_keys: Dict[EventCallback, Set[int]] = {}
+
+    def register_release_callback(self, callback: EventCallback) -> None:
+        """Register callback, so it can get executed on each KeyRelease."""
+        self.register(QEvent.KeyRelease, callback)
+
+    def set_release_keys(
+        self,
+        callback: EventCallback,
+        keys: Set[int],
+    ) -> None:
+        """Run callback on KeyRelease of given keys only, whatever else."""
+        for key in self._release_keys.pop(callback, set()):
+            self.unregister(QEvent.KeyRelease, callback, key)
+        for key in keys:
+            self.register(QEvent.KeyRelease, callback, key)
+        self._release_keys[callback] = set(keys)
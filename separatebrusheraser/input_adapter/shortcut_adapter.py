@@ -2,12 +2,22 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from time import time
+from typing import Set
 
+from qtpy.QtCore import Qt
 from qtpy.QtGui import QKeyEvent, QKeySequence
 
 from .api_krita import Krita
 from .complex_action_interface import ComplexActionInterface
 
+MODIFIER_KEYS = {
+    Qt.ShiftModifier: Qt.Key_Shift,
+    Qt.ControlModifier: Qt.Key_Control,
+    Qt.AltModifier: Qt.Key_Alt,
+    Qt.MetaModifier: Qt.Key_Meta,
+}
+"""Keys which press and hold the keyboard modifiers."""
+
 
 class ShortcutAdapter:
     """
@@ -45,15 +55,15 @@ class ShortcutAdapter:
         self.action.on_every_key_release()
 
     def _is_event_key_release(self, release_event: QKeyEvent) -> bool:
-        """Decide if the key release event is matches shortcut and is valid."""
-        return (not release_event.isAutoRepeat()
-                and not self.key_released
-                and self._match_shortcuts(
-                    self._key_sequence_from_event(release_event),
-                    self.tool_shortcut))
+        """Decide if the key release event is valid."""
+        return not release_event.isAutoRepeat() and not self.key_released
 
     def event_filter_callback(self, release_event: QKeyEvent) -> None:
-        """Handle key release if the event is related to the action."""
+        """
+        Handle key release of one of the `shortcut_keys`.
+
+        The event filter calls it only for those keys.
+        """
         if self._is_event_key_release(release_event):
             self._on_key_release()
 
@@ -67,13 +77,21 @@ class ShortcutAdapter:
         """Return shortcut assigned to shortcut red from krita settings."""
         return Krita.get_action_shortcut(self.action.name)
 
-    @staticmethod
-    def _key_sequence_from_event(event: QKeyEvent):
-        return QKeySequence(event.modifiers() | event.key())  # type: ignore
+    def shortcut_keys(self) -> Set[int]:
+        """
+        Return keys which release ends the key press.
+
+        Those are the keys of the shortcut along with its modifier keys,
+        so that releasing any part of a held shortcut counts.
+        """
+        keys = set()
+        shortcut = self.tool_shortcut
+        for i in range(shortcut.count()):
+            combination = int(shortcut[i])
+            modifiers = combination & int(Qt.KeyboardModifierMask)
+            keys.add(combination & ~int(Qt.KeyboardModifierMask))
+            for modifier, key in MODIFIER_KEYS.items():
+                if modifiers & int(modifier):
+                    keys.add(int(key))
+        return keys
 
-    @staticmethod
-    def _match_shortcuts(_a: QKeySequence, _b: QKeySequence, /) -> bool:
-        """Custom match pattern - one string is preset in another one."""
-        parsed_a = _a.toString()
-        parsed_b = _b.toString()
-        return parsed_a in parsed_b or parsed_b in parsed_a
@@ -0,0 +1,146 @@
+import math
+from array import array
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Dict, Optional, Tuple
+
+
+class LatencyHistogram:
+    """Fixed-size histogram of durations in logarithmic buckets.
+
+    Buckets grow by a factor of 2**(1/4) starting at one microsecond, so
+    any percentile is reported within 19% of the real value, and
+    everything above ~70 s lands in the last bucket.
+    """
+
+    MIN_SECONDS = 1e-6
+    BUCKETS_PER_DOUBLING = 4
+    BUCKET_COUNT = 104
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * self.BUCKET_COUNT))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.counts[self._bucket(seconds)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Return upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= threshold:
+                return min(self._upper_bound(bucket), self.max)
+        return self.max
+
+    def _bucket(self, seconds: float) -> int:
+        if seconds <= self.MIN_SECONDS:
+            return 0
+        bucket = int(math.log2(seconds / self.MIN_SECONDS)
+                     * self.BUCKETS_PER_DOUBLING) + 1
+        return min(bucket, self.BUCKET_COUNT - 1)
+
+    def _upper_bound(self, bucket: int) -> float:
+        return self.MIN_SECONDS * 2 ** (bucket / self.BUCKETS_PER_DOUBLING)
+
+
+class Instrumentation:
+    """Latency histograms of the plugin's actions.
+
+    `timed` measures the time an action spends in Python. When the action
+    was triggered from the keyboard, the time from the key event to the
+    moment `settled` is called (Krita state matches the wanted one) is
+    recorded too, under the action name with an " (input to apply)"
+    suffix.
+
+    Key event timestamps come from the windowing system clock, so they are
+    mapped to `perf_counter` through the smallest offset seen between the
+    two. The constant part of event delivery is therefore not included and
+    end-to-end numbers are a lower bound.
+    """
+
+    # Actions started longer than this after a key event were not
+    # triggered by it (menu, button click...)
+    INPUT_WINDOW_S = 0.5
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._clock_offset_ms: Optional[float] = None
+        self._last_input: Optional[Tuple[float, float]] = None
+        self._pending: Optional[Tuple[str, float]] = None
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def mark_input(self, timestamp_ms: int):
+        """Remember the timestamp of the latest key event."""
+        now = perf_counter()
+        offset = now * 1000 - timestamp_ms
+        if self._clock_offset_ms is None or offset < self._clock_offset_ms:
+            self._clock_offset_ms = offset
+        self._last_input = now, timestamp_ms
+
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorate a function to record its duration under `name`."""
+        def decorator(function: Callable) -> Callable:
+            histogram = self.histogram(name)
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                self._begin(name)
+                start = perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    histogram.record(perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def settled(self):
+        """Krita matches the wanted state, close the pending measurement."""
+        if self._pending is None:
+            return
+        name, input_time = self._pending
+        self._pending = None
+        self.histogram(f"{name} (input to apply)").record(
+            perf_counter() - input_time)
+
+    def _begin(self, name: str):
+        if self._last_input is None or self._clock_offset_ms is None:
+            return
+        received, timestamp_ms = self._last_input
+        if perf_counter() - received > self.INPUT_WINDOW_S:
+            return
+        self._last_input = None
+        self._pending = (
+            name, (timestamp_ms + self._clock_offset_ms) / 1000)
+
+    def report(self) -> str:
+        lines = [f"{'action':<50} {'count':>7} {'p50 ms':>9} "
+                 f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for name, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            lines.append(
+                f"{name:<50} {histogram.count:>7} "
+                f"{histogram.percentile(0.50) * 1000:>9.3f} "
+                f"{histogram.percentile(0.95) * 1000:>9.3f} "
+                f"{histogram.percentile(0.99) * 1000:>9.3f} "
+                f"{histogram.max * 1000:>9.3f}")
+        return "\n".join(lines) + "\n"
+
+
+instrumentation = Instrumentation()
+"""Latency histograms shared by the whole plugin."""
@@ -0,0 +1,142 @@
+import heapq
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .api_krita.preset_index import preset_index
+from .api_krita.tag_index import tag_index
+
+_WORD = re.compile(r"\w+")
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return trigrams of the words of already casefolded `text`.
+
+    Words are padded like in postgres' pg_trgm, so short queries still
+    match the start of words and whole words score higher than parts.
+    """
+    grams = set()
+    for word in _WORD.findall(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _postings(keys: Sequence[str]) -> Dict[str, Tuple[int, ...]]:
+    """Return map of trigrams to positions of keys containing them."""
+    postings: Dict[str, List[int]] = {}
+    for position, key in enumerate(keys):
+        for gram in trigrams(key):
+            postings.setdefault(gram, []).append(position)
+    return {gram: tuple(positions) for gram, positions in postings.items()}
+
+
+class PresetSearchIndex:
+    """Typo tolerant search of presets by their names and tags.
+
+    Trigrams of every name and tag are indexed once, so a query only
+    counts trigrams it shares with the names that have them, instead of
+    comparing itself against the whole library. Presets match when they
+    share at least `MIN_SHARED` of the query trigrams, exact substrings
+    and prefixes rank first, and presets in a matching tag follow with a
+    lower score. Only the best `limit` results are selected and sorted.
+    """
+
+    MIN_SHARED = 0.5
+    SUBSTRING_BONUS = 1.0
+    PREFIX_BONUS = 0.5
+    TAG_WEIGHT = 0.5
+
+    def __init__(self, names: Iterable[str],
+                 tag_presets: Dict[str, Sequence[str]]):
+        self.names: List[str] = sorted(names, key=str.casefold)
+        self._keys = [name.casefold() for name in self.names]
+        self._grams = _postings(self._keys)
+
+        positions = {name: position
+                     for position, name in enumerate(self.names)}
+        self._tag_keys = [tag.casefold() for tag in tag_presets]
+        self._tag_grams = _postings(self._tag_keys)
+        self._tag_members = [
+            tuple(positions[name] for name in presets if name in positions)
+            for presets in tag_presets.values()]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def search(self, query: str, limit: int = 50) -> List[str]:
+        """Return at most `limit` preset names best matching `query`."""
+        key = query.strip().casefold()
+        if not key:
+            return self.names[:limit]
+        grams = trigrams(key)
+        if not grams:
+            return []
+
+        scores: Dict[int, float] = {}
+        for position, score in self._scored(
+                key, grams, self._keys, self._grams):
+            scores[position] = score
+        for tag, score in self._scored(
+                key, grams, self._tag_keys, self._tag_grams):
+            score *= self.TAG_WEIGHT
+            for position in self._tag_members[tag]:
+                if scores.get(position, 0.0) < score:
+                    scores[position] = score
+
+        best = heapq.nlargest(limit, scores.items(), key=_item_score)
+        return [self.names[position] for position, _ in best]
+
+    def _scored(
+        self,
+        key: str,
+        grams: Set[str],
+        keys: Sequence[str],
+        postings: Dict[str, Tuple[int, ...]],
+    ) -> Iterable[Tuple[int, float]]:
+        """Yield positions of matching keys and their scores."""
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(postings.get(gram, ()))
+        required = max(1, int(self.MIN_SHARED * len(grams) + 0.5))
+        for position, count in shared.items():
+            if count < required:
+                continue
+            text = keys[position]
+            score = count / len(grams)
+            found = text.find(key)
+            if found >= 0:
+                score += self.SUBSTRING_BONUS
+                if found == 0:
+                    score += self.PREFIX_BONUS
+            # Of equally good matches, shorter names are closer ones
+            yield position, score - len(text) * 1e-4
+
+
+def _item_score(item: Tuple[int, float]) -> float:
+    return item[1]
+
+
+class PresetSearch:
+    """Keeps a `PresetSearchIndex` in step with the preset and tag maps.
+
+    The index is built on first use from the shared preset index and tag
+    index, and built again only after either of them was reloaded.
+    """
+
+    def __init__(self):
+        self._index: Optional[PresetSearchIndex] = None
+        self._version: Tuple[int, int] = (-1, -1)
+
+    def index(self) -> PresetSearchIndex:
+        presets = preset_index.presets()
+        tags = tag_index.tags()
+        version = (preset_index.builds, tag_index.builds)
+        if self._index is None or version != self._version:
+            self._index = PresetSearchIndex(
+                presets, {tag: tag_index.presets_of(tag) for tag in tags})
+            self._version = version
+        return self._index
+
+    def search(self, query: str, limit: int = 50) -> List[str]:
+        return self.index().search(query, limit)
@@ -0,0 +1,139 @@
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from .qtpy.qtpy.QtCore import QTimer
+from .qtpy.qtpy.QtGui import QImage
+from .settings import Setting, Settings
+
+
+class PresetUsage:
+    """Counts which preset the user switches to from which preset.
+
+    At most `max_presets` source presets are tracked, the least recently
+    switched from is dropped first, and each of them keeps at most
+    `max_followers` counters.
+    """
+
+    def __init__(self, max_presets: int = 64, max_followers: int = 4):
+        self.max_presets = max_presets
+        self.max_followers = max_followers
+        self._counts: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+    def record(self, from_preset: str, to_preset: str):
+        followers = self._counts.pop(from_preset, {})
+        self._counts[from_preset] = followers
+        followers[to_preset] = followers.get(to_preset, 0) + 1
+        if len(followers) > self.max_followers:
+            del followers[min(followers, key=followers.__getitem__)]
+        while len(self._counts) > self.max_presets:
+            self._counts.popitem(last=False)
+
+    def most_likely_next(self, preset: str) -> Optional[str]:
+        followers = self._counts.get(preset)
+        if not followers:
+            return None
+        return max(followers, key=followers.__getitem__)
+
+    def dumps(self) -> str:
+        return json.dumps(list(self._counts.items()), separators=(",", ":"))
+
+    def loads(self, data: str):
+        """Restore counters saved by `dumps`, or start over if malformed."""
+        self._counts.clear()
+        try:
+            for preset, followers in json.loads(data)[-self.max_presets:]:
+                counts = sorted(
+                    ((str(name), int(count))
+                     for name, count in followers.items()),
+                    key=lambda item: item[1])
+                self._counts[str(preset)] = dict(counts[-self.max_followers:])
+        except (TypeError, ValueError, AttributeError):
+            self._counts.clear()
+
+
+class PresetPrewarmer:
+    """Prepares the presets a brush/eraser switch is likely to go to next.
+
+    Once the user has been idle for a moment after a switch, the preset
+    most likely picked next, unless it is warm already, is resolved
+    through the preset index, its resource loaded and its thumbnail scaled
+    on a thread pool, so the next switch does not pay for it. Usage
+    counters are saved to the plugin settings at the same time.
+
+    Shortly after startup, the preset snapshot is checked and the preset
+    map built, so the first switch of a session does not pay for that.
+    """
+
+    IDLE_DELAY_MS = 750
+    STARTUP_DELAY_MS = 1500
+    THUMBNAIL_SIZE = 64
+    THUMBNAIL_CACHE_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, settings: Settings, usage_setting: Setting[str]):
+        self._settings = settings
+        self._usage_setting = usage_setting
+        self.usage = PresetUsage()
+        self.usage.loads(settings.get(usage_setting))
+        self._candidates: List[str] = []
+        self._usage_changed = False
+        self._started = False
+        self._thumbnails = None
+        self._idle_timer = QTimer()
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.timeout.connect(self._on_idle)
+
+    def on_startup(self):
+        """Schedule indexing presets once krita has settled."""
+        if not self._started:
+            self._started = True
+            QTimer.singleShot(self.STARTUP_DELAY_MS, self._prewarm_index)
+
+    def on_switch(self, from_preset: str, to_preset: str):
+        """Record a brush/eraser switch and schedule the prewarm."""
+        if from_preset != to_preset:
+            self.usage.record(from_preset, to_preset)
+            self._usage_changed = True
+        # Switching back goes to `from_preset`, which was just in use and
+        # is warm already. If the user picks another preset in the
+        # meantime, the counters give the best guess.
+        follower = self.usage.most_likely_next(to_preset)
+        self._candidates = [follower] if follower not in (
+            None, from_preset, to_preset) and not self.is_warm(follower) \
+            else []
+        self._idle_timer.start(self.IDLE_DELAY_MS)
+
+    def _on_idle(self):
+        for name in self._candidates:
+            self.prewarm(name)
+        if self._usage_changed:
+            self._usage_changed = False
+            self._settings.set(self._usage_setting, self.usage.dumps())
+
+    @property
+    def thumbnails(self):
+        """Thumbnail loader, created on first use to keep startup light."""
+        if self._thumbnails is None:
+            from .api_krita.pyqt import ThumbnailLoader
+            self._thumbnails = ThumbnailLoader(
+                self._preset_image, self.THUMBNAIL_CACHE_BYTES)
+        return self._thumbnails
+
+    def _prewarm_index(self):
+        from .api_krita.preset_index import preset_index
+        from .api_krita.preset_snapshot import preset_metadata
+        # Starts rebuilding the snapshot in the background when it is stale
+        preset_metadata.current()
+        preset_index.presets()
+
+    def is_warm(self, name: str) -> bool:
+        return self.thumbnails.get(name, self.THUMBNAIL_SIZE) is not None
+
+    def prewarm(self, name: str):
+        self.thumbnails.request(name, self.THUMBNAIL_SIZE)
+
+    @staticmethod
+    def _preset_image(name: str) -> Optional[QImage]:
+        from .api_krita.preset_index import preset_index
+        preset = preset_index.get(name)
+        return preset.image() if preset is not None else None
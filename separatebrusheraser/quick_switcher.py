@@ -0,0 +1,80 @@
+from typing import Callable
+
+from .qtpy.qtpy.QtCore import Qt
+from .qtpy.qtpy.QtWidgets import (
+    QApplication,
+    QComboBox,
+    QDialog,
+    QLineEdit,
+    QListWidget,
+    QVBoxLayout,
+)
+from .preset_search import PresetSearch
+
+
+class PresetQuickSwitcher(QDialog):
+    """Palette assigning a preset to the brush or eraser slot by name.
+
+    Results are searched again on every keystroke. Up and down keys pick
+    a result in the list while typing, enter assigns it to the chosen
+    slot and closes the palette.
+    """
+
+    RESULT_LIMIT = 50
+    SLOTS = ("Brush", "Eraser")
+    NAVIGATION_KEYS = (Qt.Key.Key_Up, Qt.Key.Key_Down,
+                       Qt.Key.Key_PageUp, Qt.Key.Key_PageDown)
+
+    def __init__(self, search: PresetSearch,
+                 assign: Callable[[str, bool], None], parent=None):
+        super().__init__(parent)
+        self._search = search
+        self._assign = assign
+        self.setWindowTitle("Quick Preset Switcher")
+
+        self.slot = QComboBox(self)
+        self.slot.addItems(self.SLOTS)
+        self.query = QLineEdit(self)
+        self.query.setPlaceholderText("Preset name or tag")
+        self.results = QListWidget(self)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.slot)
+        layout.addWidget(self.query)
+        layout.addWidget(self.results)
+
+        self.query.textChanged.connect(self.update_results)
+        self.query.returnPressed.connect(self.assign_current)
+        self.results.itemActivated.connect(self.assign_current)
+
+    def open_for(self, eraser: bool):
+        """Show the palette with an empty query, targeting given slot."""
+        self.slot.setCurrentIndex(int(eraser))
+        self.query.blockSignals(True)
+        self.query.clear()
+        self.query.blockSignals(False)
+        self.update_results()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.query.setFocus()
+
+    def update_results(self, *_):
+        names = self._search.search(self.query.text(), self.RESULT_LIMIT)
+        self.results.clear()
+        self.results.addItems(names)
+        if names:
+            self.results.setCurrentRow(0)
+
+    def assign_current(self, *_):
+        item = self.results.currentItem()
+        if item is None:
+            return
+        self._assign(item.text(), self.slot.currentIndex() == 1)
+        self.accept()
+
+    def keyPressEvent(self, event):
+        # The query line edit ignores these, so they end up here
+        if event.key() in self.NAVIGATION_KEYS:
+            QApplication.sendEvent(self.results, event)
+            return
+        super().keyPressEvent(event)
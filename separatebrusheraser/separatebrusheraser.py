@@ -1,10 +1,22 @@
 from krita import Krita, Extension  # type: ignore
 from .qtpy.qtpy.QtWidgets import QToolBar, QToolButton, QMenu, QActionGroup
-from .qtpy.qtpy import QtGui
-from .qtpy.qtpy.QtCore import QTimer, QObject, QEvent, Qt
+from .qtpy.qtpy.QtCore import QTimer, QEvent, Qt
 from functools import partial
+import json
+import os
 from .api_krita import Krita as KritaAPI
+from .api_krita import wrappers
 from .api_krita.enums import Tool
+from .api_krita.pyqt import ObjectIndex, find_objects
+from .eraser_sync import EraserStateSync, ReconcileScheduler
+from .state_store import ViewStateStore
+from .viewport_filters import ViewportFilterInstaller
+from .input_adapter.event_filter import KeyEventDispatcher
+from .prewarm import PresetPrewarmer
+from .settings import Migration, Setting, Settings
+from .instrumentation import instrumentation
+from .profiler import PluginProfiler
+from .startup import startup_report
 
 KRITA_ERASE_ACTION = "erase_action"
 BRUSH_ACTION = "dninosores_activate_brush"
@@ -14,14 +26,23 @@ ERASE_OFF_ACTION = "dninosores_eraser_off"
 ERASE_TOGGLE_ACTION = "dninosores_eraser_toggle"
 ERASE_NATIVE_TOGGLE_ACTION = "dninosores_eraser_toggle_native"
 LINE_MODIFIER_ACTION = "dninosores_line_modifier"
+REFRESH_PRESETS_ACTION = "dninosores_refresh_preset_index"
+PRESET_SWITCHER_ACTION = "dninosores_preset_quick_switcher"
+LATENCY_REPORT_ACTION = "dninosores_save_latency_report"
+LATENCY_REPORT_FILE = "separatebrusheraser_latency.txt"
+PROFILING_ACTION = "dninosores_profiling_mode"
+PROFILE_FILE = "separatebrusheraser_profile.prof"
 MENU_LOCATION = "tools/scripts"
 MENU_GROUP_NAME = "SeparateBrushEraser"
 BRUSH_MODE = "BRUSH"
 ERASER_MODE = "ERASER"
 
-# Persisted config for the line tool modifier key.
+# Persisted config of the plugin, see Settings.
 CONFIG_GROUP = "SeparateBrushEraser"
-LINE_MODIFIER_SETTING = "line_modifier_key"
+# Bump when stored settings change meaning or name, and add a migration
+# from the previous version to SETTINGS_MIGRATIONS.
+SETTINGS_VERSION = 1
+SETTINGS_MIGRATIONS: dict[int, Migration] = {}
 # Available modifier keys the user can pick for temporary line tool activation.
 # "None" disables the temporary line tool feature entirely.
 LINE_MODIFIER_KEYS = {
@@ -30,6 +51,34 @@ LINE_MODIFIER_KEYS = {
     "None": None,
 }
 DEFAULT_LINE_MODIFIER = "None"
+LINE_MODIFIER_SETTING = Setting("line_modifier_key", DEFAULT_LINE_MODIFIER)
+# Opt-in fallback that polls the eraser state on a timer, in case some
+# state change in Krita is not covered by the signals EraserStateSync binds.
+VERIFY_POLLING_SETTING = Setting("verify_polling", False)
+# Polling interval bounds and the per-second CPU budget of the fallback.
+VERIFY_MIN_INTERVAL_SETTING = Setting("verify_min_interval_ms", 16)
+VERIFY_MAX_INTERVAL_SETTING = Setting("verify_max_interval_ms", 1000)
+VERIFY_CPU_BUDGET_SETTING = Setting("verify_cpu_budget_ms", 5.0)
+# Maximum number of views whose brush/eraser state is remembered.
+STATE_STORE_CAPACITY_SETTING = Setting("state_store_capacity", 32)
+# Counters of which preset follows which, used to prewarm presets.
+PRESET_USAGE_SETTING = Setting("preset_usage", "[]")
+# Brush/eraser state of the last active view, restored in the next session.
+SESSION_STATE_SETTING = Setting("session_state", "")
+SESSION_SAVE_DELAY_MS = 2000
+# Time the plugin may add to krita's startup before it warns about it.
+STARTUP_BUDGET_SETTING = Setting("startup_budget_ms", 100.0)
+SETTINGS = (
+    LINE_MODIFIER_SETTING,
+    VERIFY_POLLING_SETTING,
+    VERIFY_MIN_INTERVAL_SETTING,
+    VERIFY_MAX_INTERVAL_SETTING,
+    VERIFY_CPU_BUDGET_SETTING,
+    STATE_STORE_CAPACITY_SETTING,
+    PRESET_USAGE_SETTING,
+    SESSION_STATE_SETTING,
+    STARTUP_BUDGET_SETTING,
+)
 
 DEBUG = False
 
@@ -41,90 +90,298 @@ def print_dbg(msg):
 
 def get_action(name: str):
     """Wrapper for non-type-safe getting action from Krita instance."""
-    return Krita.instance().action(name)
+    return KritaAPI.get_action(name)
 
 
 class BrushSettings:
-
-    def loadSettings(self):
-        self.preset = KritaAPI.get_active_view().brush_preset
-        self.size = KritaAPI.get_active_view().brush_size
-        self.flow = KritaAPI.get_active_view().flow
-        self.opacity = KritaAPI.get_active_view().opacity
-        return self
-
-    def applySettings(self):
-        KritaAPI.get_active_view().brush_preset = self.preset
-        KritaAPI.get_active_view().brush_size = self.size
-        KritaAPI.get_active_view().flow = self.flow
-        KritaAPI.get_active_view().opacity = self.opacity
+    """Immutable snapshot of the settings swapped between brush and eraser.
+
+    Flow and opacity are kept at full float precision, so a snapshot read
+    back from Krita compares equal to the one that was applied. Size, flow
+    and opacity left as None keep whatever the preset loads with.
+    """
+    __slots__ = ("preset", "size", "flow", "opacity")
+    # Tolerance for float settings that went through Krita and back
+    EPSILON = 1e-6
+
+    preset: str
+    size: float | None
+    flow: float | None
+    opacity: float | None
+
+    def __init__(self, preset: str, size: float | None,
+                 flow: float | None, opacity: float | None):
+        object.__setattr__(self, "preset", preset)
+        object.__setattr__(self, "size", size)
+        object.__setattr__(self, "flow", flow)
+        object.__setattr__(self, "opacity", opacity)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("BrushSettings snapshots are immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, BrushSettings):
+            return NotImplemented
+        return (self.preset == other.preset
+                and self._close(self.size, other.size)
+                and self._close(self.flow, other.flow)
+                and self._close(self.opacity, other.opacity))
+
+    def __repr__(self):
+        return (f"BrushSettings({self.preset!r}, size={self.size}, "
+                f"flow={self.flow}, opacity={self.opacity})")
+
+    @classmethod
+    def _close(cls, a: float | None, b: float | None) -> bool:
+        if a is None or b is None:
+            return a is b
+        return abs(a - b) <= cls.EPSILON
+
+    @classmethod
+    def ofPreset(cls, preset: str) -> "BrushSettings":
+        """Settings of a preset with its own size, flow and opacity."""
+        return cls(preset, None, None, None)
+
+    @classmethod
+    def fromView(cls, view: "wrappers.View | None" = None) -> "BrushSettings":
+        """Take a snapshot of the live settings of the given view."""
+        view = view or KritaAPI.get_active_view()
+        return cls(view.brush_preset, view.brush_size, view.painting_flow,
+                   view.painting_opacity)
+
+    def asList(self) -> list:
+        return [self.preset, self.size, self.flow, self.opacity]
+
+    @classmethod
+    def fromList(cls, values: list) -> "BrushSettings":
+        preset, size, flow, opacity = values
+        return cls(str(preset), *(None if value is None else float(value)
+                                  for value in (size, flow, opacity)))
+
+    def applySettings(self, view: "wrappers.View | None" = None,
+                      live: "BrushSettings | None" = None):
+        """Write only the settings that differ from the live ones.
+
+        `live` can be passed when a snapshot of the view was just taken,
+        to save reading it again.
+        """
+        view = view or KritaAPI.get_active_view()
+        live = live or BrushSettings.fromView(view)
+        if self.preset != live.preset:
+            view.brush_preset = self.preset
+            # Loading a preset resets size, flow and opacity to its own
+            live = BrushSettings.fromView(view)
+        if self.size is not None and not self._close(self.size, live.size):
+            view.brush_size = self.size
+        if self.flow is not None and not self._close(self.flow, live.flow):
+            view.painting_flow = self.flow
+        if self.opacity is not None \
+                and not self._close(self.opacity, live.opacity):
+            view.painting_opacity = self.opacity
         return self
 
 
 class BrushState:
-    # Store a brush state for each view
+    # Stored for each view in SeparateBrushEraserExtension.brush_states
     eraser_on: bool = False
     brush_settings: BrushSettings | None = None
     eraser_settings: BrushSettings | None = None
 
+    def dumps(self, live: BrushSettings | None = None) -> str:
+        """Return compact JSON of the state.
+
+        `live` replaces the settings of the active slot, which are only
+        stored when switching away from it.
+        """
+        brush, eraser = self.brush_settings, self.eraser_settings
+        if live:
+            if self.eraser_on:
+                eraser = live
+            else:
+                brush = live
+        return json.dumps(
+            [self.eraser_on, brush and brush.asList(),
+             eraser and eraser.asList()], separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, data: str) -> "BrushState | None":
+        try:
+            eraser_on, brush, eraser = json.loads(data)
+            state = cls()
+            state.eraser_on = bool(eraser_on)
+            state.brush_settings = brush and BrushSettings.fromList(brush)
+            state.eraser_settings = eraser and BrushSettings.fromList(eraser)
+        except (TypeError, ValueError):
+            return None
+        return state
+
 
 class SeparateBrushEraserExtension(Extension):
-    brush_state = None
     # Toggled on when the line tool is temporarily activated by modifier key
     tmp_line_activation: bool = False
 
+    @startup_report.timed("extension __init__")
     def __init__(self, parent):
         super().__init__(parent)
-        key_name = KritaAPI.read_setting(
-            CONFIG_GROUP, LINE_MODIFIER_SETTING, DEFAULT_LINE_MODIFIER)
+        self.settings = Settings(CONFIG_GROUP, SETTINGS, SETTINGS_VERSION,
+                                 SETTINGS_MIGRATIONS)
+        startup_report.budget_ms = self.settings.get(STARTUP_BUDGET_SETTING)
+        key_name = self.settings.get(LINE_MODIFIER_SETTING)
         if key_name not in LINE_MODIFIER_KEYS:
             key_name = DEFAULT_LINE_MODIFIER
         self.line_modifier_name = key_name
-        self.filter = LineModifierFilter(self, LINE_MODIFIER_KEYS[key_name])
+        # Single key event filter of every canvas, shared by all features
+        self.filter = KeyEventDispatcher()
+        for event_type in (QEvent.ShortcutOverride, QEvent.KeyPress,
+                           QEvent.KeyRelease):
+            # Key events on the canvas are what triggers the plugin's
+            # shortcuts
+            self.filter.register(
+                event_type, lambda event: instrumentation.mark_input(
+                    event.timestamp()))
+        self.line_modifier = LineModifier(
+            self, self.filter, LINE_MODIFIER_KEYS[key_name])
+        self.sync = EraserStateSync(self.verify_eraser_state)
+        self.brush_states: ViewStateStore[BrushState] = ViewStateStore(
+            self.settings.get(STATE_STORE_CAPACITY_SETTING))
+        self._active_view_key = None
+        # Widgets looked up often, by window
+        self.widgets = ObjectIndex()
+        self.prewarmer = PresetPrewarmer(self.settings, PRESET_USAGE_SETTING)
+        self.profiler = PluginProfiler(os.path.dirname(__file__))
+        self.viewport_filters = ViewportFilterInstaller(self.filter)
+        # Created, and their modules imported, the first time the palette
+        # is opened. The palette belongs to the window it was opened in.
+        self.preset_search = None
+        self.quick_switcher = None
+        # Parsed and applied only once the first view asks for its state
+        self._saved_session = self.settings.get(SESSION_STATE_SETTING)
+        self._session_timer = QTimer()
+        self._session_timer.setSingleShot(True)
+        self._session_timer.timeout.connect(self.save_session)
 
     def set_line_modifier(self, key_name: str):
         """Update the line tool modifier key and persist the choice."""
         if key_name not in LINE_MODIFIER_KEYS:
             return
         self.line_modifier_name = key_name
-        self.filter.modifier_key = LINE_MODIFIER_KEYS[key_name]
-        KritaAPI.write_setting(CONFIG_GROUP, LINE_MODIFIER_SETTING, key_name)
+        self.line_modifier.set_key(LINE_MODIFIER_KEYS[key_name])
+        self.settings.set(LINE_MODIFIER_SETTING, key_name)
 
     def switch_to_brush(self):
         KritaAPI.trigger_action("KritaShape/KisToolBrush")
 
+    def has_active_view(self):
+        window = Krita.instance().activeWindow()
+        return bool(window and window.activeView())
+
     def eraser_active(self):
         return get_action(KRITA_ERASE_ACTION).isChecked()
 
     def get_current_brush_state(self):
-        if (not KritaAPI.get_active_view() or not Krita.instance().
-                activeWindow().activeView().currentBrushPreset()):
+        window = Krita.instance().activeWindow()
+        key = self.brush_states.active_key(window)
+        if key is None:
             return None
-        if self.brush_state:
-            return self.brush_state
-        else:
+        state = self.brush_states.get(key)
+        if state:
+            return state
+        if (not window.activeView() or
+                not window.activeView().currentBrushPreset()):
+            return None
+        current_state = self.restore_session()
+        if current_state is None:
             current_state = BrushState()
             current_state.eraser_on = self.eraser_active()
-            current_state.brush_settings = BrushSettings().loadSettings()
-            current_state.eraser_settings = BrushSettings().loadSettings()
-            self.brush_state = current_state
-            return current_state
+            # Snapshots are immutable, so both slots can share one
+            current_state.brush_settings = BrushSettings.fromView()
+            current_state.eraser_settings = current_state.brush_settings
+        self.brush_states.put(key, current_state)
+        if self._active_view_key is None:
+            self._active_view_key = key
+        return current_state
+
+    def restore_session(self) -> BrushState | None:
+        """Return the state saved by the last session, applied to the view.
+
+        Only the first view to ask gets it. Presets which are gone since
+        then are replaced by the live settings.
+        """
+        data, self._saved_session = self._saved_session, ""
+        state = BrushState.loads(data) if data else None
+        if state is None:
+            return None
+        from .api_krita.preset_index import preset_index
+        live = BrushSettings.fromView()
+        # Checked against the preset snapshot while the map is not built
+        missing = {settings.preset for settings in (
+            state.brush_settings, state.eraser_settings)
+            if settings and settings.preset not in preset_index}
+        if not state.brush_settings or state.brush_settings.preset in missing:
+            state.brush_settings = live
+        if not state.eraser_settings \
+                or state.eraser_settings.preset in missing:
+            state.eraser_settings = live
+        target = (state.eraser_settings if state.eraser_on
+                  else state.brush_settings)
+        target.applySettings(live=live)
+        # Switches compare the state with krita's erase mode, match it now
+        if state.eraser_on != self.eraser_active():
+            KritaAPI.trigger_action(KRITA_ERASE_ACTION)
+        return state
+
+    def save_session(self):
+        """Store the state of the active view for the next session."""
+        self._session_timer.stop()
+        state = self.brush_states.get(self._active_view_key)
+        if not state:
+            return
+        live = BrushSettings.fromView() if self.has_active_view() else None
+        self.settings.set(SESSION_STATE_SETTING, state.dumps(live))
+
+    def on_active_view_changed(self, *_):
+        """Restore the brush/eraser state remembered for the new view."""
+        window = Krita.instance().activeWindow()
+        key = self.brush_states.active_key(window)
+        if key == self._active_view_key:
+            return
+        previous_key, self._active_view_key = self._active_view_key, key
+        previous_state = self.brush_states.get(previous_key)
+        # Views of one window share brush settings, so what is live now
+        # still belongs to the view we are leaving.
+        if previous_state and key and previous_key[0] == key[0]:
+            if previous_state.eraser_on:
+                previous_state.eraser_settings = BrushSettings.fromView()
+            else:
+                previous_state.brush_settings = BrushSettings.fromView()
+        state = self.brush_states.get(key)
+        if state:
+            settings = (state.eraser_settings if state.eraser_on
+                        else state.brush_settings)
+            if settings:
+                settings.applySettings()
+        self.sync.request()
 
     def apply_brush_state(self, state: BrushState) -> BrushState:
         """Sets brush settings to match the given state"""
         if self.eraser_active() == state.eraser_on:
             return state
 
-        current_settings = BrushSettings().loadSettings()
+        view = KritaAPI.get_active_view()
+        current_settings = BrushSettings.fromView(view)
         # toggling the eraser on
         if state.eraser_on:
             if state.eraser_settings:
-                state.eraser_settings.applySettings()
+                state.eraser_settings.applySettings(view, current_settings)
             state.brush_settings = current_settings
         else:
             state.eraser_settings = current_settings
             if state.brush_settings:
-                state.brush_settings.applySettings()
+                state.brush_settings.applySettings(view, current_settings)
+        target = state.eraser_settings if state.eraser_on else state.brush_settings
+        if target:
+            self.prewarmer.on_switch(current_settings.preset, target.preset)
+        self._session_timer.start(SESSION_SAVE_DELAY_MS)
         self.verify_eraser_state()
         return state
 
@@ -133,6 +390,7 @@ class SeparateBrushEraserExtension(Extension):
         if state:
             return self.apply_brush_state(state)
 
+    @instrumentation.timed("activate_brush")
     def activate_brush(self, switchTool=True):
         if not self.get_current_brush_state():
             return
@@ -140,8 +398,9 @@ class SeparateBrushEraserExtension(Extension):
         if switchTool:
             self.switch_to_brush()
         self.apply_current_brush_state()
-        QTimer.singleShot(0, self.verify_eraser_state)
+        self.sync.request()
 
+    @instrumentation.timed("activate_eraser")
     def activate_eraser(self, switchTool=True):
         if not self.get_current_brush_state():
             return
@@ -149,7 +408,7 @@ class SeparateBrushEraserExtension(Extension):
         if switchTool:
             self.switch_to_brush()
         self.apply_current_brush_state()
-        QTimer.singleShot(0, self.verify_eraser_state)
+        self.sync.request()
 
     def on_brush_toggled(self, toggled):
         current_brush_state = self.get_current_brush_state()
@@ -165,21 +424,98 @@ class SeparateBrushEraserExtension(Extension):
             current_brush_state.eraser_on = False
             self.apply_current_brush_state()
 
+    def assign_preset(self, preset: str, eraser: bool):
+        """Put a preset into the brush or eraser slot of the current view.
+
+        The active slot lives in the view, so the preset is loaded right
+        away. The other one is stored and loaded on the next switch.
+        """
+        state = self.get_current_brush_state()
+        if not state:
+            return
+        if self.eraser_active() == eraser:
+            KritaAPI.get_active_view().brush_preset = preset
+        elif eraser:
+            state.eraser_settings = BrushSettings.ofPreset(preset)
+            self.prewarmer.prewarm(preset)
+        else:
+            state.brush_settings = BrushSettings.ofPreset(preset)
+            self.prewarmer.prewarm(preset)
+
+    def refresh_presets(self):
+        from .api_krita.preset_index import preset_index
+        preset_index.invalidate()
+
+    def open_quick_switcher(self):
+        if not self.has_active_view():
+            return
+        qwin = KritaAPI.get_active_qwindow()
+        if self.quick_switcher is not None \
+                and self.quick_switcher.parent() != qwin:
+            self.quick_switcher.deleteLater()
+            self.quick_switcher = None
+        if self.quick_switcher is None:
+            from .preset_search import PresetSearch
+            from .quick_switcher import PresetQuickSwitcher
+            if self.preset_search is None:
+                self.preset_search = PresetSearch()
+            switcher = PresetQuickSwitcher(
+                self.preset_search, self.assign_preset, qwin)
+            # Qt deletes the palette together with its window
+            switcher.destroyed.connect(
+                partial(self.forget_quick_switcher, switcher))
+            self.quick_switcher = switcher
+        self.quick_switcher.open_for(self.eraser_active())
+
+    def forget_quick_switcher(self, switcher, *_):
+        if self.quick_switcher is switcher:
+            self.quick_switcher = None
+
     def verify_eraser_state(self):
         current_brush_state = self.get_current_brush_state()
         if current_brush_state:
             desired_state = current_brush_state.eraser_on
             if desired_state != self.eraser_active():
                 KritaAPI.trigger_action(KRITA_ERASE_ACTION)
+            else:
+                instrumentation.settled()
+
+    def save_latency_report(self):
+        """Write action latency histograms to krita's profile folder."""
+        path = os.path.join(KritaAPI.get_app_data_location(),
+                            LATENCY_REPORT_FILE)
+        with open(path, "w", encoding="utf-8") as report:
+            report.write(instrumentation.report())
+            report.write(f"\naction lookups: {KritaAPI.get_action_stats()}\n")
+            view_count = sum(len(window.views())
+                             for window in Krita.instance().windows())
+            report.write(
+                f"key event filters: {self.viewport_filters.installs} "
+                f"installs, {self.viewport_filters.viewport_count} viewports, "
+                f"{view_count} views\n")
+            report.write("\n" + startup_report.report())
+        print(f"Latency report saved to {path}")
+
+    def set_profiling(self, enabled: bool):
+        """Start profiling the plugin, or stop and save the profile."""
+        if enabled:
+            self.profiler.start()
+            return
+        report_path = self.profiler.stop(os.path.join(
+            KritaAPI.get_app_data_location(), PROFILE_FILE))
+        if report_path:
+            print(f"Profile saved to {report_path}")
 
     def on_eraser_action(self, toggled):
         pass
         # self.get_eraser_button().setChecked(self.eraser_active())
         # self.verify_eraser_state()
 
+    @instrumentation.timed("classic_krita_eraser_toggle_auto")
     def classic_krita_eraser_toggle_auto(self):
-        if self.brush_state:
-            self.classic_krita_eraser_toggle(not self.brush_state.eraser_on)
+        state = self.get_current_brush_state()
+        if state:
+            self.classic_krita_eraser_toggle(not state.eraser_on)
 
     def classic_krita_eraser_toggle(self, toggled):
         # self.verify_eraser_state()
@@ -189,6 +525,7 @@ class SeparateBrushEraserExtension(Extension):
         else:
             self.activate_brush(False)
 
+    @instrumentation.timed("native_eraser_toggle")
     def native_eraser_toggle(self):
         """Mimics Krita's default eraser toggle: flips erase mode for the
         current tool without swapping brush/eraser presets or any other
@@ -219,9 +556,24 @@ class SeparateBrushEraserExtension(Extension):
             eraser_button.setChecked(self.eraser_active())
         # self.verify_eraser_state()
 
+    @startup_report.timed("setup")
     def setup(self):
-        pass
+        # App-wide signals are connected once here, createActions runs for
+        # every window
+        appNotifier = KritaAPI.instance.notifier()
+        appNotifier.setActive(True)
+        self.sync.bind_notifier(appNotifier)
+        # Connected before the settings, so they flush the saved session
+        appNotifier.applicationClosing.connect(self.save_session)
+        self.settings.bind_notifier(appNotifier)
 
+        def installKeyEventFilter(view):
+            print_dbg("Installing key event filter")
+            self.viewport_filters.install_new(view.window().qwindow())
+
+        appNotifier.viewCreated.connect(installKeyEventFilter)
+
+    @startup_report.timed("createActions")
     def createActions(self, window):
 
         # menu = QMenu(MENU_GROUP_NAME, window.qwindow())
@@ -254,18 +606,42 @@ class SeparateBrushEraserExtension(Extension):
             ERASE_NATIVE_TOGGLE_ACTION, "Toggle Eraser for Current Tool (native)",
             MENU_LOCATION + "/" + MENU_GROUP_NAME)
 
+        # The timed wrappers take any arguments, so PyQt would pass them
+        # triggered's `checked` flag. The lambdas drop it.
         activate_brush_action.triggered.connect(
-            partial(self.activate_brush, True))
+            lambda *_: self.activate_brush(True))
         activate_eraser_action.triggered.connect(
-            partial(self.activate_eraser, True))
+            lambda *_: self.activate_eraser(True))
         enable_eraser_action.triggered.connect(
-            partial(self.activate_eraser, False))
+            lambda *_: self.activate_eraser(False))
         disable_eraser_action.triggered.connect(
-            partial(self.activate_brush, False))
+            lambda *_: self.activate_brush(False))
         toggle_eraser_action.triggered.connect(
-            self.classic_krita_eraser_toggle_auto)
+            lambda *_: self.classic_krita_eraser_toggle_auto())
         native_toggle_eraser_action.triggered.connect(
-            self.native_eraser_toggle)
+            lambda *_: self.native_eraser_toggle())
+
+        refresh_presets_action = window.createAction(
+            REFRESH_PRESETS_ACTION, "Refresh Brush Preset List",
+            MENU_LOCATION + "/" + MENU_GROUP_NAME)
+        refresh_presets_action.triggered.connect(self.refresh_presets)
+
+        preset_switcher_action = window.createAction(
+            PRESET_SWITCHER_ACTION, "Quick Preset Switcher",
+            MENU_LOCATION + "/" + MENU_GROUP_NAME)
+        preset_switcher_action.triggered.connect(self.open_quick_switcher)
+
+        latency_report_action = window.createAction(
+            LATENCY_REPORT_ACTION, "Save Latency Report",
+            MENU_LOCATION + "/" + MENU_GROUP_NAME)
+        latency_report_action.triggered.connect(self.save_latency_report)
+
+        profiling_action = window.createAction(
+            PROFILING_ACTION, "Profiling Mode",
+            MENU_LOCATION + "/" + MENU_GROUP_NAME)
+        profiling_action.setCheckable(True)
+        profiling_action.setChecked(self.profiler.running)
+        profiling_action.toggled.connect(self.set_profiling)
 
         # Submenu letting the user choose which modifier key temporarily
         # activates the line tool.
@@ -284,32 +660,33 @@ class SeparateBrushEraserExtension(Extension):
             modifier_action.triggered.connect(
                 partial(self.set_line_modifier, key_name))
 
-        appNotifier = KritaAPI.instance.notifier()
-        appNotifier.setActive(True)
-
-        def installLineModifierFilter(_view: QObject):
-            for item, level in IterHierarchy(
-                    KritaAPI.instance.activeWindow().qwindow()):
-                if item.metaObject().className() == "Viewport":
-                    print_dbg("Installing line modifier filter")
-                    item.removeEventFilter(self.filter)
-                    item.installEventFilter(self.filter)
-
-        appNotifier.viewCreated.connect(installLineModifierFilter)
+        # Connected before the settings, so they flush the saved session
+        window.windowClosed.connect(self.save_session)
+        self.settings.bind_window(window)
+        self.sync.bind_signal(window.activeViewChanged)
+        window.activeViewChanged.connect(self.on_active_view_changed)
 
         QTimer.singleShot(500, self.bind_brush_toggled)
+        self.prewarmer.on_startup()
 
     def get_eraser_button(self) -> QToolButton | None:
         qwin = KritaAPI.get_active_qwindow()
-        pobj = qwin.findChild(QToolBar, 'BrushesAndStuff')
-        eraser_button = None
-        for item, depth in IterHierarchy(pobj):
-            try:
-                if item.defaultAction() == get_action(KRITA_ERASE_ACTION):
-                    eraser_button = item
-            except Exception:
-                pass
-        return eraser_button
+        return self.widgets.get(
+            qwin, "eraser button", partial(self.find_eraser_button, qwin))
+
+    def find_eraser_button(self, qwin) -> QToolButton | None:
+        # Toolbars are children of the main window, look there first
+        toolbar = self.widgets.find(
+            qwin, QToolBar, object_name="BrushesAndStuff", max_depth=1) \
+            or self.widgets.find(
+                qwin, QToolBar, object_name="BrushesAndStuff")
+        if toolbar is None:
+            return None
+        erase_action = get_action(KRITA_ERASE_ACTION)
+        for item in find_objects(toolbar, QToolButton):
+            if item.defaultAction() == erase_action:
+                return item
+        return None
 
     def print_state(self):
         current_brush_state = self.get_current_brush_state()
@@ -324,17 +701,24 @@ class SeparateBrushEraserExtension(Extension):
             print(f"Eraser action is {self.eraser_active()}")
             print("\n")
 
+    @startup_report.timed("bind_brush_toggled")
     def bind_brush_toggled(self):
         success = False
-        Krita.instance().action(KRITA_ERASE_ACTION).triggered.connect(
-            self.on_eraser_action)
-        for docker in Krita.instance().dockers():
-            if docker.objectName() == "ToolBox":
-                for item, level in IterHierarchy(docker):
-                    if item.objectName() == "KritaShape/KisToolBrush":
-                        brush_tool = item
-                        brush_tool.toggled.connect(self.on_brush_toggled)
-                        success = True
+        erase_action = get_action(KRITA_ERASE_ACTION)
+        erase_action.triggered.connect(self.on_eraser_action)
+        self.sync.bind_signal(erase_action.toggled)
+        docker = next((docker for docker in Krita.instance().dockers()
+                       if docker.objectName() == "ToolBox"), None)
+        if docker is not None:
+            for item in find_objects(docker, QToolButton,
+                                     class_name="KoToolBoxButton"):
+                # Switching tools can reset Krita's eraser mode
+                self.sync.bind_signal(item.toggled)
+            brush_tool = self.widgets.find(
+                docker, QToolButton, object_name="KritaShape/KisToolBrush")
+            if brush_tool is not None:
+                brush_tool.toggled.connect(self.on_brush_toggled)
+                success = True
         if not success:
             print(
                 "Binding eraser toggle to brush button failed. Try restarting Krita."
@@ -347,65 +731,64 @@ class SeparateBrushEraserExtension(Extension):
             print(
                 "Binding eraser toggle to erase button failed. Try restarting Krita."
             )
-        timer = QTimer(KritaAPI.get_active_qwindow())
-        timer.timeout.connect(self.verify_eraser_state)
-        timer.start(1)
-
-
-class LineModifierFilter(QObject):
-    """EventFilter that listens for a certain modifier key and tells the extension to temporarily switch to the line tool when it the key is pressed."""
+        if self.settings.get(VERIFY_POLLING_SETTING):
+            self.sync.start_fallback_polling(ReconcileScheduler(
+                self.verify_eraser_state,
+                self.has_active_view,
+                self.settings.get(VERIFY_MIN_INTERVAL_SETTING),
+                self.settings.get(VERIFY_MAX_INTERVAL_SETTING),
+                self.settings.get(VERIFY_CPU_BUDGET_SETTING)))
+        self.sync.request()
+        # Last startup step, check the startup time once it is recorded
+        QTimer.singleShot(0, startup_report.check)
+
+
+class LineModifier:
+    """Listens for a certain modifier key and tells the extension to temporarily switch to the line tool when the key is pressed."""
     extension: SeparateBrushEraserExtension
     modifier_key: int | None
 
     def __init__(self, extension: SeparateBrushEraserExtension,
-                 modifier_key: int | None):
-        super().__init__()
+                 dispatcher: KeyEventDispatcher, modifier_key: int | None):
         self.extension = extension
+        self.dispatcher = dispatcher
+        self.modifier_key = None
+        self.set_key(modifier_key)
+
+    def set_key(self, modifier_key: int | None):
+        """Listen to another key. None disables the temporary line tool."""
+        if self.modifier_key is not None:
+            self.dispatcher.unregister(
+                QEvent.KeyPress, self.on_key_press, self.modifier_key)
+            self.dispatcher.unregister(
+                QEvent.KeyRelease, self.on_key_release, self.modifier_key)
         self.modifier_key = modifier_key
-
-    def eventFilter(self, a0: QObject | None, a1: QEvent | None) -> bool:
-        event = a1
-        # A modifier key of None means the temporary line tool is disabled.
-        if self.modifier_key is None:
-            return False
-        if event and isinstance(event, QtGui.QKeyEvent):
-            if KritaAPI.active_tool == Tool.FREEHAND_BRUSH and event.key(
-            ) == self.modifier_key and event.type() == QEvent.Type.KeyPress:
-                print_dbg("event filter activated")
-                self.extension.tmp_line_activation = True
-                KritaAPI.active_tool = Tool.LINE
-            if KritaAPI.active_tool == Tool.LINE and event.key(
-            ) == self.modifier_key and event.type() == QEvent.Type.KeyRelease:
-                print_dbg("event filter activated")
-                if self.extension.tmp_line_activation:
-                    KritaAPI.active_tool = Tool.FREEHAND_BRUSH
-                    self.extension.tmp_line_activation = False
-        return False
-
-
-class IterHierarchy:
-    queue = []
-
-    def __init__(self, root):
-        self.root = root
-        self.queue = []
-
-    def __iter__(self):
-        self.queue = self.walk_hierarchy(self.root)
-        return self
-
-    def walk_hierarchy(self, item, level=0, acc=[]):
-        acc.append((item, level))
-        for child in item.children():
-            self.walk_hierarchy(child, level + 1, acc)
-        return acc
-
-    def __next__(self):
-        if len(self.queue) > 0:
-            cur_item = self.queue.pop(0)
-            return cur_item[0], cur_item[1]
-        else:
-            raise StopIteration
+        if modifier_key is not None:
+            self.dispatcher.register(
+                QEvent.KeyPress, self.on_key_press, modifier_key)
+            self.dispatcher.register(
+                QEvent.KeyRelease, self.on_key_release, modifier_key)
+
+    def on_key_press(self, _event: QEvent):
+        if KritaAPI.active_tool == Tool.FREEHAND_BRUSH:
+            print_dbg("event filter activated")
+            self.switch_to_line()
+
+    def on_key_release(self, _event: QEvent):
+        if KritaAPI.active_tool == Tool.LINE:
+            print_dbg("event filter activated")
+            if self.extension.tmp_line_activation:
+                self.switch_back_to_brush()
+
+    @instrumentation.timed("line modifier switch")
+    def switch_to_line(self):
+        self.extension.tmp_line_activation = True
+        KritaAPI.active_tool = Tool.LINE
+
+    @instrumentation.timed("line modifier switch")
+    def switch_back_to_brush(self):
+        KritaAPI.active_tool = Tool.FREEHAND_BRUSH
+        self.extension.tmp_line_activation = False
 
 
 Krita.instance().addExtension(SeparateBrushEraserExtension(Krita.instance()))
@@ -0,0 +1,130 @@
+from typing import (
+    Any, Callable, Dict, Generic, Iterable, Optional, Set, TypeVar)
+
+from .qtpy.qtpy.QtCore import QTimer
+from .api_krita import Krita as KritaAPI
+
+T = TypeVar("T")
+
+# Upgrades stored strings by one schema version. Gets a reader of any
+# key in the group, to find keys which are no longer in the schema.
+Migration = Callable[[Callable[[str], Optional[str]], Dict[str, str]], None]
+
+
+class Setting(Generic[T]):
+    """A setting of the plugin, typed by its default value.
+
+    Kritarc stores strings only, so values are parsed when loaded and
+    formatted when written.
+    """
+
+    def __init__(self, name: str, default: T):
+        self.name = name
+        self.default = default
+
+    def parse(self, text: str) -> T:
+        kind = type(self.default)
+        if kind is bool:
+            return text.strip().lower() in ("true", "1")  # type: ignore
+        if kind is int:
+            # Accept numbers written with a fraction, as in "16.0"
+            return int(float(text))  # type: ignore
+        return kind(text)  # type: ignore
+
+    def format(self, value: T) -> str:
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return str(value)
+
+    def __repr__(self):
+        return f"Setting({self.name!r}, {self.default!r})"
+
+
+class Settings:
+    """Typed, write-behind cache of the plugin's group in kritarc.
+
+    Every setting of the schema is read once, when the cache is created,
+    so later reads never reach krita's config layer. Writes only mark the
+    value dirty and are flushed together once no other write came for
+    `FLUSH_DELAY_MS`, or right away when a window closes or krita quits.
+
+    The schema version is stored next to the settings. When older
+    settings are loaded, `migrations[n]` upgrades their strings from
+    version n to n + 1, and the upgraded values are written back.
+    """
+
+    VERSION = Setting("settings_version", 0)
+    FLUSH_DELAY_MS = 1000
+
+    def __init__(self, group: str, settings: Iterable[Setting],
+                 version: int,
+                 migrations: Optional[Dict[int, Migration]] = None):
+        self.group = group
+        self.version = version
+        self._settings = {setting.name: setting for setting in settings}
+        self._settings[self.VERSION.name] = self.VERSION
+        self._migrations = migrations or {}
+        self._values: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._load()
+
+    def get(self, setting: Setting[T]) -> T:
+        return self._values[setting.name]
+
+    def set(self, setting: Setting[T], value: T):
+        """Change the setting now, and in kritarc on the next flush."""
+        if self._values[setting.name] == value:
+            return
+        self._values[setting.name] = value
+        self._dirty.add(setting.name)
+        self._timer.start(self.FLUSH_DELAY_MS)
+
+    def flush(self):
+        """Write every changed setting to kritarc."""
+        self._timer.stop()
+        for name in sorted(self._dirty):
+            KritaAPI.write_setting(self.group, name,
+                                   self._settings[name].format(
+                                       self._values[name]))
+        self._dirty.clear()
+
+    def bind_notifier(self, notifier):
+        """Flush before krita quits."""
+        notifier.applicationClosing.connect(self.flush)
+
+    def bind_window(self, window):
+        """Flush when the window closes."""
+        window.windowClosed.connect(self.flush)
+
+    def _read(self, name: str) -> Optional[str]:
+        return KritaAPI.read_setting(self.group, name)
+
+    def _load(self):
+        stored = {name: text for name in self._settings
+                  if (text := self._read(name)) is not None}
+        stored_version = self._parse(self.VERSION, stored)
+        for version in range(stored_version, self.version):
+            migration = self._migrations.get(version)
+            if migration:
+                migration(self._read, stored)
+        if stored_version < self.version:
+            stored[self.VERSION.name] = str(self.version)
+            self._dirty.update(
+                name for name in stored if name in self._settings)
+        for name, setting in self._settings.items():
+            self._values[name] = self._parse(setting, stored)
+        if self._dirty:
+            self._timer.start(self.FLUSH_DELAY_MS)
+
+    @staticmethod
+    def _parse(setting: Setting[T], stored: Dict[str, str]) -> T:
+        text = stored.get(setting.name)
+        if text is None:
+            return setting.default
+        try:
+            return setting.parse(text)
+        except ValueError:
+            return setting.default
@@ -0,0 +1,163 @@
+import sys
+from contextlib import contextmanager
+from functools import wraps
+from importlib.machinery import ModuleSpec
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Tuple
+
+
+class _TimedLoader:
+    """Loader executing modules through `loader`, timing the execution."""
+
+    def __init__(self, loader, report: "StartupReport"):
+        self._loader = loader
+        self._report = report
+
+    def create_module(self, spec: ModuleSpec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._report._enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._report._exit_import(module.__name__)
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer:
+    """Meta path finder wrapping loaders of the modules of `package`."""
+
+    def __init__(self, package: str, report: "StartupReport"):
+        self._prefix = package + "."
+        self._report = report
+
+    def find_spec(self, name: str, path=None, target=None):
+        if not name.startswith(self._prefix):
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self._report)
+        return spec
+
+
+class StartupReport:
+    """Time the plugin adds to krita's startup, per module and step.
+
+    `timing_imports` times the import of every module of the plugin, and
+    `timed` the steps krita runs later on, like `createActions`. A
+    module's self time excludes the modules and steps it ran itself, its
+    cumulative time includes them. Steps run while a module was imported
+    (like the extension created at import) are already part of the import
+    time, so they are only counted once in the total.
+
+    `check` is meant to run once, when the plugin finished starting up. It
+    warns when the total went over `budget_ms`, and stops recording, so
+    windows opened later do not count towards startup.
+    """
+
+    def __init__(self, budget_ms: float = 100.0):
+        self.budget_ms = budget_ms
+        self.import_seconds = 0.0
+        self.step_seconds = 0.0
+        # Module name -> (self time, cumulative time), in import order
+        self.imports: Dict[str, Tuple[float, float]] = {}
+        # (step name, duration, whether run inside an import)
+        self.steps: List[Tuple[str, float, bool]] = []
+        # Time spent in nested imports and steps, for each open import
+        self._children: List[float] = []
+        self._starts: List[float] = []
+        self._checked = False
+
+    @property
+    def total_ms(self) -> float:
+        return (self.import_seconds + self.step_seconds) * 1000
+
+    @contextmanager
+    def timing_imports(self, package: str) -> Iterator[None]:
+        """Time imports of the submodules of `package` inside the block."""
+        finder = _ImportTimer(package, self)
+        sys.meta_path.insert(0, finder)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.import_seconds += perf_counter() - start
+            sys.meta_path.remove(finder)
+
+    def timed(self, step: str) -> Callable[[Callable], Callable]:
+        """Decorate a function to record its duration as startup `step`."""
+        def decorator(function: Callable) -> Callable:
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if self._checked:
+                    return function(*args, **kwargs)
+                nested = bool(self._starts)
+                self._enter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    duration = self._exit()[1]
+                    self.steps.append((step, duration, nested))
+                    if not nested:
+                        self.step_seconds += duration
+            return wrapper
+        return decorator
+
+    def check(self):
+        """Stop recording and warn if startup went over the budget."""
+        if self._checked:
+            return
+        self._checked = True
+        if self.total_ms <= self.budget_ms:
+            return
+        slowest = sorted(self.imports.items(), key=lambda item: -item[1][0])
+        print(f"Separate Brush Eraser took {self.total_ms:.1f} ms to start, "
+              f"over its {self.budget_ms:g} ms budget. Slowest modules: "
+              + ", ".join(f"{name} ({own * 1000:.1f} ms)"
+                          for name, (own, _) in slowest[:3]))
+
+    def report(self) -> str:
+        width = max(map(len, self.imports), default=0) + 2
+        lines = [f"startup: {self.total_ms:.1f} ms "
+                 f"(budget {self.budget_ms:g} ms)",
+                 f"{'module':<{width}} {'self ms':>9} {'cum ms':>9}"]
+        for name, (own, cumulative) in sorted(
+                self.imports.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<{width}} {own * 1000:>9.3f} "
+                         f"{cumulative * 1000:>9.3f}")
+        lines.append(f"{'step':<{width}} {'ms':>9}")
+        for step, duration, nested in self.steps:
+            if nested:
+                step += " (in import)"
+            lines.append(f"{step:<{width}} {duration * 1000:>9.3f}")
+        return "\n".join(lines) + "\n"
+
+    def _enter(self):
+        self._children.append(0.0)
+        self._starts.append(perf_counter())
+
+    def _exit(self) -> Tuple[float, float]:
+        """Close the innermost measurement, return its self and total time."""
+        duration = perf_counter() - self._starts.pop()
+        own = duration - self._children.pop()
+        if self._children:
+            self._children[-1] += duration
+        return own, duration
+
+    def _exit_import(self, name: str):
+        own, duration = self._exit()
+        if not self._checked:
+            self.imports[name] = own, duration
+
+
+startup_report = StartupReport()
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from .qtpy.qtpy.QtCore import QObject
+from .qtpy.qtpy.QtWidgets import QMdiArea
+
+T = TypeVar("T")
+ViewKey = Tuple[int, int]
+
+
+class ObjectKeys:
+    """Hands out stable integer keys for Qt objects without referencing them.
+
+    PyQt wrappers of objects owned by Krita come and go, so neither the
+    wrapper identity nor a `weakref` to it outlives the current call. The
+    key is stored on the C++ object itself as a dynamic property instead,
+    and listeners are told when the object is destroyed so they can drop
+    whatever they keep under its key.
+    """
+
+    KEY_PROPERTY = "separateBrushEraserKey"
+
+    def __init__(self):
+        self._next_key = 1
+        self._release_listeners: List[Callable[[int], None]] = []
+
+    def key(self, obj: QObject) -> int:
+        key = obj.property(self.KEY_PROPERTY)
+        if key is None:
+            key = self._next_key
+            self._next_key += 1
+            obj.setProperty(self.KEY_PROPERTY, key)
+            obj.destroyed.connect(partial(self._release, key))
+        return key
+
+    def on_release(self, listener: Callable[[int], None]):
+        self._release_listeners.append(listener)
+
+    def _release(self, key: int, *_):
+        for listener in self._release_listeners:
+            listener(key)
+
+
+object_keys = ObjectKeys()
+"""Keys shared by the whole plugin, they live in one dynamic property."""
+
+
+class ViewStateStore(Generic[T]):
+    """Keeps one state per Krita view, keyed by window and view identity.
+
+    Entries of closed views and windows are dropped as soon as Qt destroys
+    them. At most `capacity` entries are kept, the least recently used one
+    is evicted first.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._keys = object_keys
+        self._keys.on_release(self._forget)
+        self._states: "OrderedDict[ViewKey, T]" = OrderedDict()
+        self._mdi_areas: Dict[int, QMdiArea] = {}
+
+    def active_key(self, window) -> Optional[ViewKey]:
+        """Return key of the active view in the given Krita window."""
+        if window is None:
+            return None
+        qwindow = window.qwindow()
+        window_key = self._keys.key(qwindow)
+        mdi_area = self._mdi_areas.get(window_key)
+        if mdi_area is None:
+            mdi_area = qwindow.findChild(QMdiArea)
+            if mdi_area is None:
+                return None
+            self._mdi_areas[window_key] = mdi_area
+        subwindow = mdi_area.activeSubWindow()
+        if subwindow is None:
+            return None
+        return window_key, self._keys.key(subwindow)
+
+    def get(self, key: Optional[ViewKey]) -> Optional[T]:
+        if key is None:
+            return None
+        state = self._states.get(key)
+        if state is not None:
+            self._states.move_to_end(key)
+        return state
+
+    def put(self, key: ViewKey, state: T):
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > self.capacity:
+            self._states.popitem(last=False)
+
+    def __len__(self):
+        return len(self._states)
+
+    def _forget(self, key: int):
+        self._mdi_areas.pop(key, None)
+        for view_key in [k for k in self._states if key in k]:
+            del self._states[view_key]
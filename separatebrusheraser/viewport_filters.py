@@ -0,0 +1,56 @@
+from typing import Set
+
+from .qtpy.qtpy.QtCore import QObject
+from .qtpy.qtpy.QtWidgets import QMdiArea
+from .api_krita.pyqt import find_object, find_objects
+from .state_store import object_keys
+
+
+class ViewportFilterInstaller:
+    """Installs an event filter on the canvas viewport of every view once.
+
+    Only subwindows of the main window that were not handled yet are
+    searched for viewports. Subwindows and viewports are remembered by
+    their object keys and forgotten when Qt destroys them, so closing a
+    view drops its entries.
+    """
+
+    def __init__(self, event_filter: QObject):
+        self._filter = event_filter
+        self._subwindows: Set[int] = set()
+        self._viewports: Set[int] = set()
+        # Filters installed since the plugin started
+        self.installs = 0
+        object_keys.on_release(self._forget)
+
+    @property
+    def viewport_count(self) -> int:
+        return len(self._viewports)
+
+    def install_new(self, qwindow: QObject):
+        mdi_area = find_object(qwindow, QMdiArea)
+        if mdi_area is None:
+            return
+        for subwindow in mdi_area.subWindowList():
+            key = object_keys.key(subwindow)
+            if key in self._subwindows:
+                continue
+            found = False
+            for viewport in find_objects(subwindow, class_name="Viewport"):
+                found = True
+                self._install(viewport)
+            # Retry on the next view if the canvas is not there yet
+            if found:
+                self._subwindows.add(key)
+
+    def _install(self, viewport: QObject):
+        key = object_keys.key(viewport)
+        if key in self._viewports:
+            return
+        self._viewports.add(key)
+        viewport.installEventFilter(self._filter)
+        self.installs += 1
+
+    def _forget(self, key: int):
+        self._subwindows.discard(key)
+        self._viewports.discard(key)